@@ -0,0 +1,72 @@
+"""
+Compares the html_parser backends on sample pages.
+
+Usage:
+    python3 -m benchmarks.bench_parsers [page.html ...]
+
+With no arguments, the fixture server's synthetic pages (small, default and
+large) and a synthetic marketing page (large nav/footer, many sections and
+links) are used.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixture_server import synthetic_page
+from src.html_parser import PARSER_BACKENDS, make_soup, resolve_backend
+
+def synthetic_marketing_page(sections=150, links_per_section=20):
+    nav = "".join(f'<li><a href="/service-{i}/">Service {i}</a></li>' for i in range(80))
+    body = "".join(
+        f'<section class="block block-{s}"><h2>Section {s}</h2>'
+        f'<p>We have 25+ Years of experience serving Northwest Arkansas and Tulsa Metro. Contact us today.</p>'
+        + "".join(f'<a class="cta" href="/page-{s}-{i}/">Link {i}</a>' for i in range(links_per_section))
+        + '<img src="/img/hero.jpg" alt="Hero"></section>'
+        for s in range(sections)
+    )
+    return (
+        '<!DOCTYPE html><html><head><title>Heating &amp; Cooling | Example</title>'
+        '<meta name="description" content="Trusted HVAC services."><script>var x = 1;</script></head>'
+        f'<body><header><nav><ul>{nav}</ul></nav></header><main><h1>Heating Services</h1>{body}</main>'
+        f'<footer><ul>{nav}</ul></footer></body></html>'
+    )
+
+def time_backend(html, backend, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make_soup(html, backend)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def sample_pages():
+    return [
+        ("fixture page (5KB, 20 links)", synthetic_page(0, kb=5, links=20)),
+        ("fixture page (40KB, 60 links)", synthetic_page(0)),
+        ("fixture page (200KB, 300 links)", synthetic_page(0, kb=200, links=300)),
+        ("synthetic_marketing_page", synthetic_marketing_page())
+    ]
+
+def main(paths):
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append((os.path.basename(path), f.read()))
+    if not paths:
+        pages = sample_pages()
+
+    backends = [b for b in PARSER_BACKENDS if resolve_backend(b) == b]
+    print(f"{'page':40} {'size':>9} " + " ".join(f"{b:>14}" for b in backends))
+    for name, html in pages:
+        repeat = 20 if len(html) < 200_000 else 5
+        timings = {b: time_backend(html, b, repeat) for b in backends}
+        baseline = timings['html.parser']
+        cells = " ".join(
+            f"{timings[b] * 1000:8.2f}ms x{baseline / timings[b]:3.1f}" if timings[b] else f"{'-':>14}"
+            for b in backends
+        )
+        print(f"{name[:40]:40} {len(html):>9} {cells}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
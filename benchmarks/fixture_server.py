@@ -0,0 +1,160 @@
+"""
+Local HTTP fixture for the benchmarks: synthetic pages, link targets with
+known outcomes, a fake Google Doc /pub page and a fake BugHerd API.
+
+Routes:
+    /page/<i>?kb=40&links=60    Page i, ~kb kilobytes of copy and `links` links (ETag / 304 aware)
+    /page/fail/<i>              500
+    /page/slow/<i>              200 after `slow_delay` seconds
+    /link/ok/<k>                200
+    /link/missing/<k>           404
+    /link/slow/<k>              200 after `slow_delay` seconds
+    /link/error/<k>             500
+    /doc/<id>/pub               Published Google Doc matching the pages' SEO data and metrics
+    POST /api/v2/projects/<id>/tasks.json              Fake BugHerd: 201
+    POST /api/v2/projects/<id>/tasks/<t>/comments.json Fake BugHerd: 201
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+METRICS = ("25+ Years", "4.9 Stars", "50+ Service areas")
+
+def link_kind(k):
+    """Outcome of link k: mostly OK, with a fixed share of 404s, slow and failing targets."""
+    if k % 20 == 7:
+        return "slow"
+    if k % 10 == 3:
+        return "missing"
+    if k % 25 == 11:
+        return "error"
+    return "ok"
+
+def synthetic_page(i, kb=40, links=60):
+    paragraph = (
+        "<p>We have 25+ Years of experience serving Northwest Arkansas and Tulsa Metro. "
+        "Rated 4.9 Stars by homeowners across 50+ Service areas. Contact us today for a free quote.</p>"
+    )
+    copy = paragraph * max(1, (kb * 1024) // len(paragraph))
+    anchors = "".join(f'<li><a href="/link/{link_kind(k)}/{k}">Link {k}</a></li>' for k in range(links))
+    return (
+        f"<!DOCTYPE html><html><head><title>Fixture Page {i}</title>"
+        f'<meta name="description" content="Trusted heating and cooling for page {i}."></head>'
+        f'<body><header><nav><ul>{anchors}</ul></nav></header>'
+        f'<main><h1>Heating and Cooling {i}</h1><section class="copy">{copy}</section></main></body></html>'
+    )
+
+def synthetic_doc(i=0):
+    # extract_text joins elements with single spaces, so the fields are split by line
+    # breaks inside one text node: the SEO patterns stop at a newline
+    return (
+        '<html><body><div id="contents">'
+        f"SEO Title: Fixture Page {i}\n"
+        f"Meta Description: Trusted heating and cooling for page {i}.\n"
+        f"H1: Heating and Cooling {i}\n"
+        # "40+ Years" is not on the pages, so every page has one issue to ticket
+        f"Metrics That Matter: {' '.join(METRICS)} 40+ Years\n"
+        "</div></body></html>"
+    )
+
+class FixtureServer:
+    """Serves the fixture routes on 127.0.0.1 from a background thread. Use as a context manager."""
+
+    def __init__(self, slow_delay=0.05):
+        self.slow_delay = slow_delay
+        self.hits = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def count(self, route):
+        with self._lock:
+            self.hits[route] += 1
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _route(self):
+                parsed = urlparse(self.path)
+                parts = parsed.path.strip("/").split("/")
+                query = parse_qs(parsed.query)
+                fixture.count(parts[0] if parts else "")
+
+                if parts[0] == "page":
+                    if parts[1] == "fail":
+                        return self._send(500, b"fail")
+                    if parts[1] == "slow":
+                        time.sleep(fixture.slow_delay)
+                        return self._send(200, synthetic_page(parts[-1]).encode())
+                    kb = int(query.get("kb", ["40"])[0])
+                    links = int(query.get("links", ["60"])[0])
+                    etag = '"' + hashlib.md5(self.path.encode()).hexdigest() + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        return self._send(304, headers={"ETag": etag})
+                    return self._send(200, synthetic_page(parts[1], kb, links).encode(), headers={"ETag": etag})
+
+                if parts[0] == "link":
+                    kind = parts[1]
+                    if kind == "slow":
+                        time.sleep(fixture.slow_delay)
+                    status = {"ok": 200, "slow": 200, "missing": 404, "error": 500}.get(kind, 404)
+                    return self._send(status, b"ok" if status == 200 else b"no")
+
+                if parts[0] == "doc" and parts[-1] == "pub":
+                    return self._send(200, synthetic_doc().encode())
+
+                return self._send(404, b"not found")
+
+            def do_GET(self):
+                self._route()
+
+            def do_HEAD(self):
+                self._route()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                fixture.count("api")
+                if self.path.startswith("/api/v2/projects/") and self.path.endswith(".json"):
+                    return self._send(201, json.dumps({"task": {"id": 1}}).encode(), content_type="application/json")
+                return self._send(404, b"not found")
+
+        return Handler
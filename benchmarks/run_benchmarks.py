@@ -0,0 +1,212 @@
+"""
+Offline benchmark suite. Everything runs against a local fixture server
+(benchmarks/fixture_server.py), so results don't depend on live sites.
+
+Usage:
+    python3 -m benchmarks.run_benchmarks                    # run and compare with the baseline
+    python3 -m benchmarks.run_benchmarks --save-baseline    # run and store the numbers as the new baseline
+    python3 -m benchmarks.run_benchmarks --only fuzzy_match,element_locator --repeat 10
+
+Each benchmark reports the median wall time of one run (latency) and items per
+second (throughput). A benchmark whose median is more than --threshold slower
+than the baseline is flagged as a REGRESSION and the exit code is 1.
+Baselines are machine-specific: record one on the runner you compare on.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fixture_server import FixtureServer, METRICS, synthetic_page
+from benchmarks.bench_parsers import synthetic_marketing_page
+from src.engine import BugHerdEngine
+from src.doc_parser import GoogleDocParser
+from src.element_locator import ElementLocator
+from src.link_checker import LinkChecker
+from src.html_parser import make_soup
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# name -> function(server) returning (seconds, items) for one run
+BENCHMARKS = {}
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+def make_engine(server, pages=20, kb=40, links=60):
+    """
+    Engine with its own temporary base_path (config, .cache, reports) pointed at the
+    fixture. Besides the `pages` regular pages, the project has one slow and one failing page.
+    """
+    base_path = tempfile.mkdtemp(prefix="bench_")
+    live_pages = {f"Page {i}": server.url(f"/page/{i}?kb={kb}&links={links}") for i in range(pages)}
+    live_pages["Slow page"] = server.url("/page/slow/0")
+    live_pages["Failing page"] = server.url("/page/fail/0")
+    config = {
+        "projects": [{
+            "id": "bench",
+            "name": "Bench",
+            "bugherd_project_id": "1",
+            "google_doc_url": server.url("/doc/bench/edit"),
+            "live_pages": live_pages,
+            "rules": {"bad_phrases": ["Lorem ipsum", "Coming soon"], "required_phrases": ["Contact us", "free quote"]}
+        }],
+        "settings": {
+            "timeout": 5,
+            "link_max_retries": 0,
+            "bugherd_rate_per_sec": 1000,
+            "bugherd_burst": 1000,
+            "bugherd_dedupe_days": 0
+        }
+    }
+    with open(os.path.join(base_path, "config.json"), "w") as f:
+        json.dump(config, f)
+    engine = BugHerdEngine(config_path="config.json", bugherd_api_key="bench", base_path=base_path)
+    engine.bh_client.base_url = server.url("/api/v2")
+    return engine
+
+def page_count(engine):
+    return len(engine.get_project("bench")["live_pages"])
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+@benchmark
+def run_qa_project_cold(server):
+    """20 pages plus a slow and a failing one, with link checks, nothing cached."""
+    engine = make_engine(server)
+    try:
+        return timed(lambda: engine.run_qa_project("bench", check_links=True)), page_count(engine)
+    finally:
+        shutil.rmtree(engine.base_path, ignore_errors=True)
+
+@benchmark
+def run_qa_project_warm(server):
+    """Second run of the same project: conditional GETs (304) and a warm link cache."""
+    engine = make_engine(server)
+    try:
+        engine.run_qa_project("bench", check_links=True)
+        return timed(lambda: engine.run_qa_project("bench", check_links=True)), page_count(engine)
+    finally:
+        shutil.rmtree(engine.base_path, ignore_errors=True)
+
+@benchmark
+def run_qa_project_tickets(server):
+    """20 pages, each missing a metric from the doc, filing tickets to the fake BugHerd API."""
+    engine = make_engine(server)
+    try:
+        return timed(lambda: engine.run_qa_project("bench", auto_ticket=True)), page_count(engine)
+    finally:
+        shutil.rmtree(engine.base_path, ignore_errors=True)
+
+@benchmark
+def check_page_links(server):
+    """One page with 200 links (404s, 500s and slow targets included), no cache."""
+    checker = LinkChecker(user_agent="bench", timeout=5)
+    url = server.url("/page/links?kb=1&links=200")
+    soup = make_soup(synthetic_page("links", kb=1, links=200))
+    return timed(lambda: checker.check_page_links(url, soup=soup)), 200
+
+@benchmark
+def fuzzy_match(server):
+    """30 metric lookups (half absent) in ~60KB of page text."""
+    text = make_soup(synthetic_page(0, kb=60, links=0)).get_text()
+    needles = list(METRICS) * 5 + [f"{n}0+ Certified technicians on call" for n in range(15)]
+    parser = GoogleDocParser(user_agent="bench")
+    return timed(lambda: [parser.fuzzy_match(needle, text) for needle in needles]), len(needles)
+
+@benchmark
+def element_locator(server):
+    """Locate every link (~6000) on a large marketing page."""
+    soup = make_soup(synthetic_marketing_page(sections=150, links_per_section=20))
+    anchors = soup.find_all("a")
+    locator = ElementLocator()
+    return timed(lambda: [locator.element_info(a) for a in anchors]), len(anchors)
+
+def run(names, repeat):
+    results = {}
+    with FixtureServer() as server:
+        for name in names:
+            samples = [BENCHMARKS[name](server) for _ in range(repeat)]
+            seconds = [s for s, _ in samples]
+            items = samples[0][1]
+            median = statistics.median(seconds)
+            results[name] = {
+                "median_s": round(median, 6),
+                "min_s": round(min(seconds), 6),
+                "items_per_s": round(items / median, 2) if median else None
+            }
+    return results
+
+def compare(results, baseline, threshold):
+    """Prints a table against the baseline. Returns the names of regressed benchmarks."""
+    regressions = []
+    print(f"{'benchmark':28} {'median':>10} {'items/s':>12} {'baseline':>10} {'change':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = ""
+        flag = ""
+        if base and base.get("median_s"):
+            ratio = result["median_s"] / base["median_s"] - 1
+            change = f"{ratio:+.0%}"
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions.append(name)
+            elif ratio < -threshold:
+                flag = "  faster"
+        base_text = f"{base['median_s'] * 1000:8.1f}ms" if base else f"{'-':>10}"
+        print(f"{name:28} {result['median_s'] * 1000:8.1f}ms {result['items_per_s'] or 0:12.1f} {base_text} {change:>8}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="auto-bugherd offline benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark (median is reported)")
+    parser.add_argument("--only", help="Comma-separated benchmark names")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Slowdown vs baseline that counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+
+    results = run(names, max(1, args.repeat))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f).get("benchmarks", {})
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "benchmarks": baseline
+            }, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
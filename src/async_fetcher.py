@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import threading
+from .host_limiter import THROTTLE_STATUSES
+from .metrics import HTTP_ERRORS, StageTimer
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency, only needed for --async
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+class AsyncFetcher:
+    """
+    Event-loop based fetcher behind the engine's --async mode.
+
+    Live pages, the Google Doc and every link target share one aiohttp session
+    on an event loop running in a background thread, so concurrency is bounded
+    by connector limits instead of one OS thread per request. The fetcher only
+    does I/O: it hands back response bodies, and the engine's page workers parse
+    and check them, so parsing never blocks the loop. Each link target is checked
+    once per run even if many pages share it.
+
+    Use it as a context manager. fetch_page, fetch_doc and check_links can be
+    called from any thread and return concurrent.futures.Future objects.
+
+        with AsyncFetcher(user_agent) as fetcher:
+            pending = fetcher.fetch_page(url)
+            page = pending.result()  # {"body", "not_modified", "timings"}
+    """
+
+    def __init__(self, user_agent, timeout=10, max_connections=1000, limit_per_host=100, page_cache=None):
+        if aiohttp is None:
+            raise RuntimeError("Async mode requires aiohttp. Install it with: pip install aiohttp")
+        self.headers = {'User-Agent': user_agent}
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.limit_per_host = limit_per_host
+        self.page_cache = page_cache
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._link_tasks = {}
+        self._host_slots = {}
+
+    def __enter__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-fetcher", daemon=True)
+        self._thread.start()
+        self._submit(self._open()).result()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._submit(self._close()).result()
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = None
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _open(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.limit_per_host)
+        # Like requests' timeout: limits connecting and each read, not the time spent
+        # waiting for a free connector slot, so a long queue doesn't turn into timeouts
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers)
+        self._link_tasks = {}
+        self._host_slots = {}
+
+    async def _close(self):
+        # Fetches nobody waited for (e.g. after a worker crashed) are dropped
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await self._session.close()
+        self._session = None
+
+    def fetch_page(self, url, rate_limiter=None):
+        """
+        Starts downloading a live page, taking a token from rate_limiter (a
+        TokenBucket) first if given. The future's result is a dict with the
+        body (None if the page was unreachable), not_modified (True when the
+        page cache answered a 304) and the fetch timings in seconds.
+        """
+        return self._submit(self._fetch_page(url, rate_limiter))
+
+    def fetch_doc(self, url):
+        """Starts downloading the published Google Doc. The future's result is its HTML, or None."""
+        return self._submit(self._fetch_doc(url))
+
+    def check_links(self, targets, link_checker, stats=None, statuses=None):
+        """
+        Starts checking a page's link targets, using link_checker's cache and
+        HostLimiter. The future's result is the list of broken links. stats and
+        statuses, if given, are filled like LinkChecker.check_links fills them.
+        """
+        return self._submit(self._check_links(targets, link_checker, stats, statuses))
+
+    async def _fetch_page(self, url, rate_limiter):
+        # One trace row per page, since every fetch shares the event loop thread
+        timer = StageTimer(label=url, lane=url)
+        await self._acquire(rate_limiter)
+        with timer.stage('fetch'):
+            status, body, not_modified = await self._get_text(url)
+        if status != 200:
+            HTTP_ERRORS.inc(target='page', status=status or 'error')
+            logger.error(f"Failed to reach {url}: HTTP {status}")
+            body = None
+        return {"body": body, "not_modified": not_modified, "timings": timer.timings}
+
+    async def _fetch_doc(self, url):
+        status, html, _ = await self._get_text(url)
+        if status != 200:
+            HTTP_ERRORS.inc(target='doc', status=status or 'error')
+            logger.error(f"Failed to fetch Google Doc: HTTP {status}")
+            return None
+        return html
+
+    async def _check_links(self, targets, link_checker, stats, statuses):
+        broken, to_check = link_checker.split_cached(targets, statuses)
+        for target in to_check:
+            if target not in self._link_tasks:
+                self._link_tasks[target] = asyncio.ensure_future(self._check_link(target, link_checker))
+        checked = await asyncio.gather(*(self._link_tasks[t] for t in to_check))
+        if stats is not None:
+            stats.update({
+                "total": len(targets),
+                "cached": len(targets) - len(to_check),
+                "unverified": sum(1 for _, result, verified in checked if not result and not verified)
+            })
+        if statuses is not None:
+            statuses.extend(link_checker.link_status(t, status, verified=verified) for t, (status, _, verified) in zip(to_check, checked))
+        return broken + [result for _, result, _ in checked if result]
+
+    @staticmethod
+    async def _acquire(rate_limiter):
+        """Waits for a rate_limiter token without blocking the event loop."""
+        while rate_limiter:
+            wait = rate_limiter.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    async def _get_text(self, url):
+        """GET through the page cache when enabled. Returns (status, body, not_modified)."""
+        try:
+            headers = self.page_cache.request_headers(url) if self.page_cache else None
+            async with self._session.get(url, headers=headers) as response:
+                body = await response.text(errors='replace') if response.status == 200 else None
+                if self.page_cache:
+                    return self.page_cache.resolve(url, response.status, response.headers, body)
+                return response.status, body, False
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None, None, False
+
+    async def _check_link(self, absolute_url, link_checker):
+        """Async counterpart of LinkChecker._check_single_link. Returns (status_code, broken_message, verified)."""
+        status, result, verified = await self._probe_link(absolute_url, link_checker.limiter)
+        if link_checker.cache and verified:
+            link_checker.cache.set(absolute_url, status, result)
+        return status, result, verified
+
+    async def _probe_link(self, absolute_url, limiter):
+        """Async counterpart of LinkChecker._probe_link, sharing its HostLimiter state."""
+        if not limiter.allow(absolute_url):
+            return None, None, False
+
+        host = limiter.host_of(absolute_url)
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(limiter.max_per_host)
+
+        attempt = 0
+        while True:
+            async with self._host_slots[host]:
+                status, result, retry_after = await self._request_link(absolute_url)
+            delay = limiter.after_attempt(absolute_url, attempt, status, retry_after)
+            if delay is None:
+                return limiter.link_result(absolute_url, status, result)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _request_link(self, absolute_url):
+        try:
+            # HEAD request is faster than GET
+            async with self._session.head(absolute_url, allow_redirects=True) as res:
+                status, retry_after = res.status, res.headers.get('Retry-After')
+            if status >= 400 and status not in THROTTLE_STATUSES:
+                # Retry with GET as some servers block HEAD
+                async with self._session.get(absolute_url) as res:
+                    status, retry_after = res.status, res.headers.get('Retry-After')
+            if status >= 400:
+                HTTP_ERRORS.inc(target='link', status=status)
+                return status, f"{absolute_url} ({status})", retry_after
+            return status, None, None
+        except Exception as e:
+            HTTP_ERRORS.inc(target='link', status='error')
+            return None, f"{absolute_url} (Error: {str(e) or type(e).__name__})", None
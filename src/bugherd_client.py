@@ -5,15 +5,14 @@ import logging
 logger = logging.getLogger(__name__)
 
 class BugHerdClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, session=None, timeout=10):
         self.api_key = api_key or os.getenv("BUGHERD_API_KEY")
+        self.session = session or requests.Session()
+        self.timeout = timeout
         self.base_url = "https://www.bugherd.com/api/v2"
 
-    def create_ticket(self, project_id, description, page_url=None):
-        if not self.api_key:
-            logger.error("BugHerd API Key missing. Skipping ticket creation.")
-            return None
-
+    def post_task(self, project_id, description, page_url=None):
+        """POSTs a new task and returns the raw response. Connection errors and timeouts propagate."""
         url = f"{self.base_url}/projects/{project_id}/tasks.json"
         payload = {
             "task": {
@@ -25,9 +24,15 @@ class BugHerdClient:
                 }
             }
         }
-        
+        return self.session.post(url, auth=(self.api_key, 'x'), json=payload, timeout=self.timeout)
+
+    def create_ticket(self, project_id, description, page_url=None):
+        if not self.api_key:
+            logger.error("BugHerd API Key missing. Skipping ticket creation.")
+            return None
+
         try:
-            response = requests.post(url, auth=(self.api_key, 'x'), json=payload)
+            response = self.post_task(project_id, description, page_url=page_url)
             if response.status_code == 201:
                 logger.info(f"Ticket created successfully in project {project_id}")
                 return response.json()
@@ -47,7 +52,7 @@ class BugHerdClient:
         payload = {"comment": {"text": text}}
         
         try:
-            response = requests.post(url, auth=(self.api_key, 'x'), json=payload)
+            response = self.session.post(url, auth=(self.api_key, 'x'), json=payload, timeout=self.timeout)
             if response.status_code == 201:
                 logger.info(f"Comment added to task {task_id}")
                 return response.json()
@@ -73,7 +78,13 @@ class BugHerdClient:
         if not self.api_key:
             logger.error("BugHerd API Key missing. Skipping ticket creation.")
             return None
-        
+
+        description = self.element_ticket_description(issue_type, element_info, expected, found, page_url)
+        return self.create_ticket(project_id, description, page_url=page_url)
+
+    @staticmethod
+    def element_ticket_description(issue_type, element_info, expected, found, page_url):
+        """Markdown ticket body with the expected/found values and the element's location."""
         # Build structured description
         description = f"**{issue_type}**\n\n"
         
@@ -94,5 +105,4 @@ class BugHerdClient:
                 description += f"- **Context:** \"{element_info['context']}\"\n"
         
         description += f"\n🔗 **Page URL:** {page_url}"
-        
-        return self.create_ticket(project_id, description, page_url=page_url)
+        return description
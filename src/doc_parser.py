@@ -1,35 +1,69 @@
 import requests
-from bs4 import BeautifulSoup
 import re
 import logging
+from .text_index import PageTextIndex
+from .html_parser import make_soup, tree_backend
+from .metrics import HTTP_ERRORS
 
 logger = logging.getLogger(__name__)
 
 class GoogleDocParser:
-    def __init__(self, user_agent):
+    def __init__(self, user_agent, session=None, page_cache=None, parser_backend='html.parser'):
         self.headers = {'User-Agent': user_agent}
+        # The doc's full text is needed, so a streaming backend falls back to a tree builder
+        self.parser_backend = tree_backend(parser_backend)
+        self.session = session or requests.Session()
+        self.page_cache = page_cache
+
+    @staticmethod
+    def get_pub_url(url):
+        """
+        Maps an editor URL to the public /pub view of the document.
+        """
+        if "/edit" in url:
+            return url.replace("/edit", "/pub")
+        return url
+
+    @staticmethod
+    def extract_text(html, parser_backend='html.parser'):
+        """
+        Extracts the document body text from a published Google Doc page.
+        """
+        soup = make_soup(html, tree_backend(parser_backend))
+        content_div = soup.find('div', id='contents') or soup.body
+        if content_div:
+            return content_div.get_text(separator=' ', strip=True)
+        return None
 
     def fetch_text_public(self, url):
-        if not url:
-            return None
         """
         Fetches text from a public Google Doc by export/view mode.
         """
-        if "/edit" in url:
-            pub_url = url.replace("/edit", "/pub")
-        else:
-            pub_url = url
+        if not url:
+            return None
+        pub_url = self.get_pub_url(url)
             
         try:
-            response = requests.get(pub_url, headers=self.headers, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                content_div = soup.find('div', id='contents') or soup.body
-                if content_div:
-                    return content_div.get_text(separator=' ', strip=True)
-            logger.error(f"Failed to fetch Google Doc: HTTP {response.status_code}")
+            if self.page_cache:
+                status, body, not_modified = self.page_cache.fetch(self.session, pub_url, headers=self.headers, timeout=10)
+            else:
+                response = self.session.get(pub_url, headers=self.headers, timeout=10)
+                status, body, not_modified = response.status_code, response.text, False
+
+            if status == 200:
+                text = self.page_cache.parsed(pub_url) if not_modified else None
+                if text is None:
+                    text = self.extract_text(body, self.parser_backend)
+                    if text and self.page_cache:
+                        self.page_cache.remember_parsed(pub_url, text)
+                if text:
+                    return text
+            else:
+                HTTP_ERRORS.inc(target='doc', status=status)
+            logger.error(f"Failed to fetch Google Doc: HTTP {status}")
             return None
         except Exception as e:
+            HTTP_ERRORS.inc(target='doc', status='error')
             logger.error(f"Error fetching Google Doc: {e}")
             return None
 
@@ -77,30 +111,8 @@ class GoogleDocParser:
     def fuzzy_match(self, needle, haystack, threshold=0.8):
         """
         Simple fuzzy matching to find text even with minor variations.
+        haystack may be a string or a prebuilt PageTextIndex.
         """
-        from difflib import SequenceMatcher
         if not needle or not haystack:
             return False
-            
-        needle = needle.lower().strip()
-        haystack = haystack.lower()
-        
-        # Exact match first
-        if needle in haystack:
-            return True
-            
-        # Sliding window for fuzzy comparison
-        words = haystack.split()
-        needle_words = needle.split()
-        n_len = len(needle_words)
-        
-        if n_len == 0:
-            return False
-            
-        # Check if any segment of haystack is close to needle
-        for i in range(len(words) - n_len + 1):
-            segment = " ".join(words[i:i+n_len])
-            ratio = SequenceMatcher(None, needle, segment).ratio()
-            if ratio >= threshold:
-                return True
-        return False
+        return PageTextIndex.of(haystack).fuzzy_contains(needle, threshold)
@@ -0,0 +1,199 @@
+import logging
+from bs4 import CData, NavigableString, Tag
+
+logger = logging.getLogger(__name__)
+
+# name -> DomCheck subclass; populated by @register_check
+CHECK_REGISTRY = {}
+
+# Checks every page needs: the SEO elements and the link list
+DEFAULT_CHECKS = ('title', 'meta_description', 'h1', 'links')
+
+def register_check(cls):
+    """Class decorator that makes a DomCheck available to DomPipeline by name."""
+    CHECK_REGISTRY[cls.name] = cls
+    return cls
+
+class DomCheck:
+    """
+    A check that runs inside the single DOM walk.
+
+    Subclasses set `name`, list the tag names they care about in `tags`, and get
+    `visit(element)` for each matching element in document order. `result()` is
+    collected once the walk ends. Checks with `reports_issues = True` return a
+    list of issue strings; the others return whatever their consumer needs.
+    A fresh instance is created for every page.
+    """
+    name = None
+    tags = ()
+    reports_issues = False
+
+    def visit(self, element):
+        pass
+
+    def result(self):
+        return None
+
+class _FirstElementCheck(DomCheck):
+    def __init__(self):
+        self.element = None
+
+    def matches(self, element):
+        return True
+
+    def visit(self, element):
+        if self.element is None and self.matches(element):
+            self.element = element
+
+    def result(self):
+        return self.element
+
+@register_check
+class TitleCheck(_FirstElementCheck):
+    """First <title>, as soup.title."""
+    name = 'title'
+    tags = ('title',)
+
+@register_check
+class MetaDescriptionCheck(_FirstElementCheck):
+    """First <meta name="description">."""
+    name = 'meta_description'
+    tags = ('meta',)
+
+    def matches(self, element):
+        return element.get('name') == 'description'
+
+@register_check
+class H1Check(_FirstElementCheck):
+    """First <h1>."""
+    name = 'h1'
+    tags = ('h1',)
+
+@register_check
+class LinksCheck(DomCheck):
+    """href values of every <a href>, for the link checker."""
+    name = 'links'
+    tags = ('a',)
+
+    def __init__(self):
+        self.hrefs = []
+
+    def visit(self, element):
+        href = element.get('href')
+        if href is not None:
+            self.hrefs.append(href)
+
+    def result(self):
+        return self.hrefs
+
+@register_check
+class ImagesAltCheck(DomCheck):
+    """Flags <img> tags without alt text."""
+    name = 'images_alt'
+    tags = ('img',)
+    reports_issues = True
+
+    def __init__(self):
+        self.missing = []
+
+    def visit(self, element):
+        if not (element.get('alt') or '').strip():
+            self.missing.append(element.get('src') or '[no src]')
+
+    def result(self):
+        if not self.missing:
+            return []
+        shown = ', '.join(self.missing[:5])
+        more = f" (+{len(self.missing) - 5} more)" if len(self.missing) > 5 else ""
+        return [f"{len(self.missing)} image(s) missing alt text: {shown}{more}"]
+
+@register_check
+class HeadingsCheck(DomCheck):
+    """Flags multiple H1s and skipped heading levels (e.g. h2 -> h4)."""
+    name = 'headings'
+    tags = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+    reports_issues = True
+
+    def __init__(self):
+        self.h1_count = 0
+        self.previous_level = 0
+        self.skips = []
+
+    def visit(self, element):
+        level = int(element.name[1])
+        if level == 1:
+            self.h1_count += 1
+        if self.previous_level and level > self.previous_level + 1:
+            self.skips.append(f"h{self.previous_level} -> h{level}")
+        self.previous_level = level
+
+    def result(self):
+        issues = []
+        if self.h1_count > 1:
+            issues.append(f"Multiple H1 tags found ({self.h1_count})")
+        if self.skips:
+            issues.append(f"Skipped heading levels: {', '.join(self.skips[:5])}")
+        return issues
+
+class DomScan:
+    """Output of one DomPipeline walk: the page text plus each check's result by name."""
+
+    def __init__(self, text, results):
+        self.text = text
+        self.results = results
+
+    def get(self, name, default=None):
+        return self.results.get(name, default)
+
+    def issues(self):
+        """Issue strings from every issue-reporting check, in registration order."""
+        found = []
+        for name, value in self.results.items():
+            if CHECK_REGISTRY[name].reports_issues:
+                found.extend(value)
+        return found
+
+class DomPipeline:
+    """
+    Walks a parsed document once, dispatching elements to the checks that
+    subscribed to their tag and collecting the page text (as soup.get_text())
+    in the same pass.
+    """
+
+    def __init__(self, check_names=DEFAULT_CHECKS):
+        self.check_classes = []
+        for name in dict.fromkeys(check_names):
+            if name in CHECK_REGISTRY:
+                self.check_classes.append(CHECK_REGISTRY[name])
+            else:
+                logger.warning(f"Unknown DOM check '{name}' ignored. Available: {', '.join(CHECK_REGISTRY)}")
+
+    @classmethod
+    def for_rules(cls, rules):
+        """Default checks plus any extra ones listed in a project's rules['dom_checks']."""
+        return cls(DEFAULT_CHECKS + tuple(rules.get('dom_checks', [])))
+
+    def run(self, soup):
+        checks = [check_class() for check_class in self.check_classes]
+        by_tag = {}
+        for check in checks:
+            for tag in check.tags:
+                by_tag.setdefault(tag, []).append(check.visit)
+
+        # Same string filter soup.get_text() applies, so the text is identical
+        text_types = getattr(soup, 'interesting_string_types', None) or (NavigableString, CData)
+        single_type = isinstance(text_types, type)
+        strings = []
+
+        for element in soup.descendants:
+            if isinstance(element, Tag):
+                visitors = by_tag.get(element.name)
+                if visitors:
+                    for visit in visitors:
+                        visit(element)
+            elif isinstance(element, NavigableString):
+                element_type = type(element)
+                if (element_type is text_types) if single_type else (element_type in text_types):
+                    strings.append(element)
+
+        return DomScan("".join(strings), {check.name: check.result() for check in checks})
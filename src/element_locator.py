@@ -3,85 +3,118 @@ from bs4 import BeautifulSoup, Tag
 
 logger = logging.getLogger(__name__)
 
+# Depth limits keep selectors readable
+CSS_MAX_PARTS = 5
+XPATH_MAX_PARTS = 8
+
 class ElementLocator:
     """
     Generates CSS selectors and XPath for BeautifulSoup elements
     to help developers locate issues in the DOM.
+
+    An instance caches the same-tag position of every child of each parent it
+    visits, so locating many elements in one document (e.g. bulk ticketing)
+    scans each parent's children once. Use one instance per document; the
+    static helpers build a throwaway instance per call.
     """
-    
+
+    def __init__(self):
+        # id(parent) -> (parent, {id(child): (same-tag position, same-tag count)}).
+        # Keyed by identity because Tag equality compares whole subtrees.
+        self._positions = {}
+
+    def _sibling_position(self, element):
+        """1-based position of element among its parent's children with the same tag, and their count."""
+        parent = element.parent
+        if parent is None:
+            return 1, 1
+
+        entry = self._positions.get(id(parent))
+        if entry is None:
+            counts = {}
+            positions = {}
+            for child in parent.children:
+                if isinstance(child, Tag):
+                    counts[child.name] = counts.get(child.name, 0) + 1
+                    positions[id(child)] = (child.name, counts[child.name])
+            table = {key: (position, counts[name]) for key, (name, position) in positions.items()}
+            # Holding the parent keeps its id from being reused while cached
+            entry = self._positions[id(parent)] = (parent, table)
+        return entry[1][id(element)]
+
+    def _paths(self, element):
+        """CSS selector and XPath for element, built in a single upward walk."""
+        css_parts = []
+        xpath_parts = []
+        css_done = False
+        current = element
+
+        while current and current.name != '[document]' and len(xpath_parts) < XPATH_MAX_PARTS:
+            position, count = self._sibling_position(current)
+
+            if not css_done:
+                if current.get('id'):
+                    # ID is unique, stop here
+                    css_parts.append(f"#{current.get('id')}")
+                    css_done = True
+                else:
+                    classes = current.get('class', [])
+                    selector_part = f"{current.name}.{'.'.join(classes)}" if classes else current.name
+                    if count > 1:
+                        selector_part = f"{selector_part}:nth-child({position})"
+                    css_parts.append(selector_part)
+                    css_done = len(css_parts) >= CSS_MAX_PARTS
+
+            xpath_parts.append(f"{current.name}[{position}]" if count > 1 else current.name)
+            current = current.parent
+
+        css = ' > '.join(reversed(css_parts)) if css_parts else None
+        xpath = '/' + '/'.join(reversed(xpath_parts)) if xpath_parts else None
+        return css, xpath
+
+    def css_selector(self, element):
+        if not isinstance(element, Tag):
+            return None
+        return self._paths(element)[0]
+
+    def xpath(self, element):
+        if not isinstance(element, Tag):
+            return None
+        return self._paths(element)[1]
+
+    def element_info(self, element, with_paths=True):
+        """
+        Get comprehensive location info for an element.
+        Returns a dict with css_selector, xpath, and context.
+        Pass with_paths=False for elements from a reduced document (e.g. a
+        head-only scan), whose selectors would not match the real page.
+        """
+        if not element:
+            return None
+
+        css, xpath = self._paths(element) if with_paths and isinstance(element, Tag) else (None, None)
+        return {
+            "tag": element.name if isinstance(element, Tag) else None,
+            "css_selector": css,
+            "xpath": xpath,
+            "context": ElementLocator.get_element_context(element)
+        }
+
     @staticmethod
     def get_css_selector(element):
         """
         Generate a CSS selector for the given element.
         Tries to create a unique, readable selector.
         """
-        if not isinstance(element, Tag):
-            return None
-            
-        # Build selector from element and its parents
-        parts = []
-        current = element
-        
-        while current and current.name != '[document]':
-            selector_part = current.name
-            
-            # Add ID if present (most specific)
-            if current.get('id'):
-                selector_part = f"#{current.get('id')}"
-                parts.insert(0, selector_part)
-                break  # ID is unique, stop here
-            
-            # Add classes if present
-            classes = current.get('class', [])
-            if classes:
-                class_str = '.'.join(classes)
-                selector_part = f"{current.name}.{class_str}"
-            
-            # Add nth-child if needed for uniqueness
-            if current.parent:
-                siblings = [s for s in current.parent.children if isinstance(s, Tag) and s.name == current.name]
-                if len(siblings) > 1:
-                    index = siblings.index(current) + 1
-                    selector_part = f"{selector_part}:nth-child({index})"
-            
-            parts.insert(0, selector_part)
-            current = current.parent
-            
-            # Limit depth to keep selector readable
-            if len(parts) >= 5:
-                break
-        
-        return ' > '.join(parts) if parts else None
-    
+        return ElementLocator().css_selector(element)
+
     @staticmethod
     def get_xpath(element):
         """
         Generate an XPath for the given element.
         """
-        if not isinstance(element, Tag):
-            return None
-            
-        parts = []
-        current = element
-        
-        while current and current.name != '[document]':
-            # Count siblings with same tag name
-            siblings = [s for s in current.parent.children if isinstance(s, Tag) and s.name == current.name] if current.parent else [current]
-            
-            if len(siblings) > 1:
-                index = siblings.index(current) + 1
-                parts.insert(0, f"{current.name}[{index}]")
-            else:
-                parts.insert(0, current.name)
-            
-            current = current.parent
-            
-            # Limit depth
-            if len(parts) >= 8:
-                break
-        
-        return '/' + '/'.join(parts) if parts else None
-    
+        return ElementLocator().xpath(element)
+
     @staticmethod
     def get_element_context(element, chars=100):
         """
@@ -90,27 +123,19 @@ class ElementLocator:
         """
         if not isinstance(element, Tag):
             return None
-            
+
         text = element.get_text(strip=True)
-        
+
         # Truncate if too long
         if len(text) > chars:
             text = text[:chars] + "..."
-        
+
         return text if text else "[No text content]"
-    
+
     @staticmethod
     def get_element_info(element):
         """
         Get comprehensive location info for an element.
         Returns a dict with css_selector, xpath, and context.
         """
-        if not element:
-            return None
-            
-        return {
-            "tag": element.name if isinstance(element, Tag) else None,
-            "css_selector": ElementLocator.get_css_selector(element),
-            "xpath": ElementLocator.get_xpath(element),
-            "context": ElementLocator.get_element_context(element)
-        }
+        return ElementLocator().element_info(element)
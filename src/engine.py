@@ -1,31 +1,57 @@
-import requests
 import json
 import sys
 import os
 import argparse
 import logging
-from bs4 import BeautifulSoup
+from contextlib import nullcontext
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from .bugherd_client import BugHerdClient
+from .ticket_outbox import TicketOutbox
 from .doc_parser import GoogleDocParser
 from .link_checker import LinkChecker
 from .report_generator import ReportGenerator
 from .element_locator import ElementLocator
+from .http_session import create_session
+from .async_fetcher import AsyncFetcher
+from .link_cache import LinkStatusCache
+from .host_limiter import HostLimiter
+from .page_cache import PageCache
+from .text_index import PageTextIndex
+from .phrase_matcher import PhraseMatcher
+from .dom_pipeline import DomPipeline
+from .html_parser import make_soup, resolve_backend, scan_head
+from .incremental_state import IncrementalState, fingerprint, normalize_text
+from .page_discovery import PageDiscovery
+from .metrics import StageTimer, HTTP_ERRORS
+from .profiler import RunProfiler, in_run_context
+from .results_store import ResultsStore
 
 # Configure logging to be more descriptive
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class BugHerdEngine:
-    def __init__(self, config_path="config.json", bugherd_api_key=None):
-        # Resolve config path relative to project root (2 levels up from src/engine.py)
-        self.base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    def __init__(self, config_path="config.json", bugherd_api_key=None, base_path=None):
+        # Resolve config path relative to project root (2 levels up from src/engine.py).
+        # .cache/ and reports/ also live under base_path.
+        self.base_path = base_path or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.config_path = config_path
         config_full_path = os.path.join(self.base_path, config_path)
         
         self.config = {
             "projects": [],
             "settings": {
                 "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "timeout": 10
+                "timeout": 10,
+                "max_page_workers": 4,
+                "http_pool_connections": 20,
+                "http_pool_maxsize": 50,
+                "async_max_connections": 1000,
+                "async_limit_per_host": 100,
+                "page_cache": True,
+                "html_parser": "html.parser",
+                "head_only_max_bytes": 1000000
             }
         }
 
@@ -43,120 +69,290 @@ class BugHerdEngine:
             
         self.headers = {'User-Agent': self.config['settings']['user_agent']}
         self.timeout = self.config['settings']['timeout']
+        self.max_page_workers = max(1, int(self.config['settings'].get('max_page_workers', 4)))
+        self.parser_backend = resolve_backend(self.config['settings'].get('html_parser'))
+        self.head_only_max_bytes = int(self.config['settings'].get('head_only_max_bytes', 1000000))
         
+        # One pooled session shared by every sub-client so connections stay warm
+        self.session = create_session(self.config['settings'])
+
+        # Conditional-GET body cache for live pages and the Google Doc
+        self.page_cache = PageCache(os.path.join(self.base_path, ".cache", "pages")) if self.config['settings'].get('page_cache', True) else None
+
         # Initialize sub-clients
-        self.bh_client = BugHerdClient(api_key=bugherd_api_key)
-        self.doc_parser = GoogleDocParser(user_agent=self.config['settings']['user_agent'])
-        self.link_checker = LinkChecker(user_agent=self.config['settings']['user_agent'], timeout=self.timeout)
-        self.report_gen = ReportGenerator(output_dir=os.path.join(self.base_path, "reports"))
+        self.bh_client = BugHerdClient(api_key=bugherd_api_key, session=self.session, timeout=self.timeout)
+        self.ticket_outbox = TicketOutbox.from_settings(
+            self.bh_client, os.path.join(self.base_path, ".cache", "ticket_outbox.json"), self.config['settings']
+        )
+        self.doc_parser = GoogleDocParser(user_agent=self.config['settings']['user_agent'], session=self.session, page_cache=self.page_cache, parser_backend=self.parser_backend)
+        self.link_cache = LinkStatusCache(
+            path=os.path.join(self.base_path, ".cache", "link_status.json"),
+            ttls=self.config['settings'].get('link_cache_ttl')
+        )
+        self.link_checker = LinkChecker(
+            user_agent=self.config['settings']['user_agent'], timeout=self.timeout, session=self.session,
+            cache=self.link_cache, limiter=HostLimiter.from_settings(self.config['settings']),
+            parser_backend=self.parser_backend
+        )
+        self.report_gen = ReportGenerator(
+            output_dir=os.path.join(self.base_path, "reports"),
+            formats=self.config['settings'].get('report_formats', ["html"])
+        )
+        # Run history for new / fixed / recurring issue queries (.cache/results.sqlite3)
+        self.results_store = ResultsStore.from_settings(self.base_path, self.config['settings'])
+        self.dom_pipeline = DomPipeline()
+
+    def fetch_live_soup(self, url, timer=None):
+        """Fetches and parses url. Pass a StageTimer to record the 'fetch' and 'parse' stages."""
+        timer = timer or StageTimer(label=url)
+        fetched = self.fetch_live_body(url, timer)
+        if fetched is None:
+            return None
+        return self.parse_live_body(url, *fetched, timer=timer)
 
-    def fetch_live_soup(self, url):
+    def fetch_live_body(self, url, timer=None):
+        """Fetches url through the page cache. Returns (body, not_modified), or None if unreachable."""
+        timer = timer or StageTimer(label=url)
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            if response.status_code == 200:
-                return BeautifulSoup(response.text, 'html.parser')
-            logger.error(f"Failed to reach {url}: HTTP {response.status_code}")
+            with timer.stage('fetch'):
+                if self.page_cache:
+                    status, body, not_modified = self.page_cache.fetch(self.session, url, headers=self.headers, timeout=self.timeout)
+                else:
+                    response = self.session.get(url, headers=self.headers, timeout=self.timeout)
+                    status, body, not_modified = response.status_code, response.text, False
+            if status == 200:
+                return body, not_modified
+            HTTP_ERRORS.inc(target='page', status=status)
+            logger.error(f"Failed to reach {url}: HTTP {status}")
+            return None
+        except Exception as e:
+            HTTP_ERRORS.inc(target='page', status='error')
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+
+    def parse_live_body(self, url, body, not_modified=False, timer=None):
+        timer = timer or StageTimer(label=url)
+        try:
+            with timer.stage('parse'):
+                # A 304 means the body is unchanged, so the last parse can be reused too
+                soup = self.page_cache.parsed(url) if not_modified else None
+                if soup is None:
+                    soup = make_soup(body, self.parser_backend)
+                    if self.page_cache:
+                        self.page_cache.remember_parsed(url, soup)
+            return soup
+        except Exception as e:
+            logger.error(f"Error parsing {url}: {e}")
             return None
+
+    def fetch_head_soup(self, url, timer=None):
+        """
+        Streams url and stops reading once </head> and the first <h1> are in, or
+        head_only_max_bytes is reached. Returns a soup holding only the title,
+        meta description and H1, for metadata-only (--head-only) runs.
+        Parsing happens while streaming, so a StageTimer records it all as 'fetch'.
+        """
+        timer = timer or StageTimer(label=url)
+        try:
+            with timer.stage('fetch'):
+                with self.session.get(url, headers=self.headers, timeout=self.timeout, stream=True) as response:
+                    if response.status_code != 200:
+                        HTTP_ERRORS.inc(target='page', status=response.status_code)
+                        logger.error(f"Failed to reach {url}: HTTP {response.status_code}")
+                        return None
+                    scanner, bytes_read, truncated = scan_head(
+                        response.iter_content(chunk_size=16384), response.encoding, self.head_only_max_bytes
+                    )
+            if truncated:
+                logger.warning(f"Stopped reading {url} at {bytes_read} bytes before finding </head> and <h1>")
+            logger.debug(f"Head-only fetch of {url} read {bytes_read} bytes")
+            return scanner.to_soup()
         except Exception as e:
+            HTTP_ERRORS.inc(target='page', status='error')
             logger.error(f"Error fetching {url}: {e}")
             return None
 
-    def check_seo_metadata(self, soup, target_meta, page_name, page_url=None, project_id=None, auto_ticket=False):
-        """Check SEO metadata and optionally create enriched tickets."""
+    def async_fetcher(self):
+        """
+        An AsyncFetcher for --async runs. Use it as a context manager: pages, the
+        Google Doc and link targets are downloaded on its event loop, and parsed
+        and checked by the caller as in sync runs.
+        """
+        settings = self.config['settings']
+        return AsyncFetcher(
+            user_agent=settings['user_agent'],
+            timeout=self.timeout,
+            max_connections=int(settings.get('async_max_connections', 1000)),
+            limit_per_host=int(settings.get('async_limit_per_host', 100)),
+            page_cache=self.page_cache
+        )
+
+    def fetch_doc_text(self, doc_url, fetcher=None):
+        """The Google Doc's text, downloaded on fetcher's event loop when one is given."""
+        if not doc_url:
+            return None
+        if not fetcher:
+            return self.doc_parser.fetch_text_public(doc_url)
+        doc_html = fetcher.fetch_doc(self.doc_parser.get_pub_url(doc_url)).result()
+        return self.doc_parser.extract_text(doc_html, self.parser_backend) if doc_html else None
+
+    @staticmethod
+    def await_async_page(pending, timer):
+        """Waits for an AsyncFetcher.fetch_page future. Returns (body, not_modified), or None if unreachable."""
+        page = pending.result()
+        timer.extend(page['timings'])
+        if page['body'] is None:
+            return None
+        return page['body'], page['not_modified']
+
+    def check_page_links(self, url, links, stats, statuses, fetcher=None):
+        """
+        Checks a page's links, on fetcher's event loop when one is given. Returns the
+        broken links, and fills stats (counts) and statuses (one entry per target).
+        """
+        if not fetcher:
+            return self.link_checker.check_page_links(url, links=links, stats=stats, statuses=statuses)
+        logger.info(f"🔍 Checking all links on {url}...")
+        targets = self.link_checker.extract_link_targets(url, hrefs=links)
+        return fetcher.check_links(targets, self.link_checker, stats=stats, statuses=statuses).result()
+
+    def check_seo_metadata(self, soup, target_meta, page_name, page_url=None, project_id=None, auto_ticket=False, scan=None, locate=True):
+        """
+        Check SEO metadata and optionally create enriched tickets.
+        Pass the page's DomScan as `scan` to reuse the elements found in the single DOM walk.
+        Pass locate=False when soup is not the full page (--head-only or the streaming
+        html_parser): tickets then carry only the element's text, not a CSS selector or XPath.
+        """
         issues = []
         if not soup or not target_meta:
             return issues
+        locator = ElementLocator()
 
         # Check Title
         if target_meta.get('title'):
-            title_element = soup.title
+            title_element = scan.get('title') if scan else soup.title
             live_title = title_element.string.strip() if title_element else "Missing Title Tag"
             if not self.doc_parser.fuzzy_match(target_meta['title'], live_title):
                 issue_msg = f"SEO Title mismatch. Expected: '{target_meta['title']}', Found: '{live_title}'"
                 issues.append(issue_msg)
                 
                 if auto_ticket and project_id and title_element:
-                    element_info = ElementLocator.get_element_info(title_element)
-                    self.bh_client.create_ticket_with_element(
+                    element_info = locator.element_info(title_element, with_paths=locate)
+                    self.ticket_outbox.add_element_issue(
                         project_id, "SEO Title Mismatch", element_info,
                         target_meta['title'], live_title, page_url
                     )
 
         # Check Description
         if target_meta.get('description'):
-            desc_element = soup.find('meta', attrs={'name': 'description'})
+            desc_element = scan.get('meta_description') if scan else soup.find('meta', attrs={'name': 'description'})
             live_desc_content = desc_element['content'].strip() if desc_element else "Missing Meta Description"
             if not self.doc_parser.fuzzy_match(target_meta['description'], live_desc_content, threshold=0.6):
                 issue_msg = f"Meta Description mismatch. Expected snippet of: '{target_meta['description'][:50]}...'"
                 issues.append(issue_msg)
                 
                 if auto_ticket and project_id and desc_element:
-                    element_info = ElementLocator.get_element_info(desc_element)
-                    self.bh_client.create_ticket_with_element(
+                    element_info = locator.element_info(desc_element, with_paths=locate)
+                    self.ticket_outbox.add_element_issue(
                         project_id, "Meta Description Mismatch", element_info,
                         target_meta['description'][:100], live_desc_content[:100], page_url
                     )
 
         # Check H1
         if target_meta.get('h1'):
-            h1_element = soup.find('h1')
+            h1_element = scan.get('h1') if scan else soup.find('h1')
             live_h1_text = h1_element.get_text().strip() if h1_element else "Missing H1 Tag"
             if not self.doc_parser.fuzzy_match(target_meta['h1'], live_h1_text):
                 issue_msg = f"H1 Header mismatch. Expected: '{target_meta['h1']}', Found: '{live_h1_text}'"
                 issues.append(issue_msg)
                 
                 if auto_ticket and project_id and h1_element:
-                    element_info = ElementLocator.get_element_info(h1_element)
-                    self.bh_client.create_ticket_with_element(
+                    element_info = locator.element_info(h1_element, with_paths=locate)
+                    self.ticket_outbox.add_element_issue(
                         project_id, "H1 Mismatch", element_info,
                         target_meta['h1'], live_h1_text, page_url
                     )
 
         return issues
 
-    def run_qa_ad_hoc(self, url, doc_url=None, auto_ticket=False, project_id=None, check_links=False):
+    def run_qa_ad_hoc(self, url, doc_url=None, auto_ticket=False, project_id=None, check_links=False, use_async=False, head_only=False):
         logger.info(f"Starting Ad-Hoc QA Check for {url}")
+        self.link_cache.start_run()
+        check_links, use_async = self._resolve_head_only(head_only, check_links, use_async)
+        with self.async_fetcher() if use_async else nullcontext() as fetcher:
+            return self._run_ad_hoc(url, doc_url, auto_ticket, project_id, check_links, head_only, fetcher)
+
+    def _run_ad_hoc(self, url, doc_url, auto_ticket, project_id, check_links, head_only, fetcher=None):
         results = []
         issues = []
-        
+        run_timer = StageTimer()
+        timer = StageTimer(label=url)
+
+        # With --async the page downloads while the doc is fetched
+        pending = fetcher.fetch_page(url) if fetcher else None
         doc_text = None
         target_seo = None
         if doc_url:
-            doc_text = self.doc_parser.fetch_text_public(doc_url)
+            with run_timer.stage('doc'):
+                doc_text = self.fetch_doc_text(doc_url, fetcher)
             if doc_text:
                 logger.info("Found Source of Truth via Google Doc.")
                 target_seo = self.doc_parser.extract_seo_metadata(doc_text)
             else:
                 logger.warning("Could not fetch Google Doc content.")
 
-        soup = self.fetch_live_soup(url)
+        if pending:
+            fetched = self.await_async_page(pending, timer)
+            soup = self.parse_live_body(url, *fetched, timer=timer) if fetched else None
+        else:
+            soup = self.fetch_head_soup(url, timer) if head_only else self.fetch_live_soup(url, timer)
         if not soup:
             return False
 
-        content = soup.get_text()
+        with timer.stage('dom_scan'):
+            scan = self.dom_pipeline.run(soup)
+        with timer.stage('text_index'):
+            content = PageTextIndex(scan.text)
 
         # 1. SEO Metadata Check
         if target_seo:
-            issues.extend(self.check_seo_metadata(soup, target_seo, "Ad-Hoc", page_url=url, project_id=project_id, auto_ticket=auto_ticket))
+            with timer.stage('seo'):
+                issues.extend(self.check_seo_metadata(
+                    soup, target_seo, "Ad-Hoc", page_url=url, project_id=project_id, auto_ticket=auto_ticket, scan=scan,
+                    locate=not (head_only or self.parser_backend == 'streaming')
+                ))
 
-        # 2. Metrics Check
-        if doc_text:
-            doc_metrics = self.doc_parser.find_metrics_block(doc_text)
-            for metric in doc_metrics:
-                if not self.doc_parser.fuzzy_match(metric, content):
-                    issue_msg = f"Metric '{metric}' missing or mismatch."
-                    issues.append(issue_msg)
-                    if auto_ticket and project_id:
-                        self.bh_client.create_ticket(project_id, issue_msg, page_url=url)
+        # 2. Metrics Check (needs body text, which the streaming parser doesn't keep)
+        if doc_text and self.parser_backend != 'streaming' and not head_only:
+            with timer.stage('metrics'):
+                doc_metrics = self.doc_parser.find_metrics_block(doc_text)
+                for metric in doc_metrics:
+                    if not self.doc_parser.fuzzy_match(metric, content):
+                        issue_msg = f"Metric '{metric}' missing or mismatch."
+                        issues.append(issue_msg)
+                        if auto_ticket and project_id:
+                            self.ticket_outbox.add(project_id, f"Metric mismatch: {metric}", issue_msg, page_url=url)
 
         # 3. Link Check
+        result = {"page_name": "Ad-Hoc Check", "url": url, "issues": issues}
         if check_links:
-            broken = self.link_checker.check_page_links(url)
+            result['link_stats'] = {}
+            result['link_statuses'] = []
+            with timer.stage('links'):
+                broken = self.check_page_links(url, scan.get('links'), result['link_stats'], result['link_statuses'], fetcher)
+            result['broken_links'] = broken
             if broken:
                 issues.append(f"Broken links found: {', '.join(broken)}")
+            self.link_cache.save()
+        result['timings'] = timer.as_dict()
+
+        if auto_ticket:
+            with run_timer.stage('ticketing'):
+                self.ticket_outbox.flush()
 
-        results.append({"page_name": "Ad-Hoc Check", "url": url, "issues": issues})
-        self.report_gen.generate_html_report("Ad-Hoc Run", results)
+        results.append(result)
+        self.record_results("ad-hoc", "Ad-Hoc Run", results, run_timer.as_dict(), {"url": url, "check_links": check_links, "head_only": head_only})
+        self.report_gen.generate_html_report("Ad-Hoc Run", results, run_timings=run_timer.as_dict())
 
         if issues:
             logger.error(f"{len(issues)} issues found in QA run.")
@@ -165,64 +361,381 @@ class BugHerdEngine:
         logger.info("QA Check Passed!")
         return True
 
-    def run_qa_project(self, project_id, auto_ticket=False, check_links=False):
-        project = next((p for p in self.config['projects'] if str(p['id']) == str(project_id)), None)
+    def profiler(self, name, trace=False):
+        """A RunProfiler writing to reports/profiles/ under base_path."""
+        return RunProfiler(os.path.join(self.base_path, "reports", "profiles"), name, trace=trace)
+
+    def get_project(self, project_id):
+        return next((p for p in self.config['projects'] if str(p['id']) == str(project_id)), None)
+
+    def run_qa_project(self, project_id, auto_ticket=False, check_links=False, use_async=False, incremental=False, head_only=False):
+        project = self.get_project(project_id)
         if not project:
             logger.error(f"Project ID {project_id} not found in config.")
             return False
 
+        self.link_cache.start_run()
+        run_timer = StageTimer()
+        options = {"auto_ticket": auto_ticket, "check_links": check_links, "use_async": use_async, "incremental": incremental, "head_only": head_only}
+        run_id = self.results_store.start_run(project['id'], project['name'], options) if self.results_store else None
+
+        # Each page is written to the report and the results store as soon as it finishes,
+        # so a long run shows progress and a crash keeps what was done
+        with self.report_gen.open_report(project['name']) as report:
+            def on_result(result):
+                report.add(result)
+                if run_id:
+                    self.results_store.add_page(run_id, project['id'], result)
+
+            results = self.collect_project_results(project, run_timer=run_timer, on_result=on_result, **options)
+            if auto_ticket:
+                # Tickets are queued by the page workers and filed together, deduplicated and rate limited
+                with run_timer.stage('ticketing'):
+                    self.ticket_outbox.flush()
+            report.close(run_timer.as_dict())
+        if run_id:
+            self.results_store.finish_run(run_id, run_timer.as_dict())
+        return all(not r['issues'] for r in results)
+
+    def collect_project_results(self, project, page_names=None, auto_ticket=False, check_links=False, use_async=False, incremental=False, head_only=False, run_timer=None, on_result=None, doc_text=None):
+        """
+        Runs the checks for a project's pages (or only those named in page_names)
+        and returns the per-page results in config order. Tickets are left queued
+        in self.ticket_outbox and no report is written.
+
+        Each result carries its per-stage 'timings' in ms. Run-wide stages (doc
+        fetch, the page checks as a whole) are recorded on run_timer if given.
+        on_result, if given, is called with each result as soon as it is ready.
+        doc_text, if given, is the Google Doc's text already fetched by the caller
+        (e.g. once for all --all slices of the project), so it isn't fetched again.
+        """
         logger.info(f"Starting QA for Project: {project['name']}")
+        run_timer = run_timer or StageTimer()
+        check_links, use_async = self._resolve_head_only(head_only, check_links, use_async)
+
+        # Discovery only runs for whole-project runs; --all page slices list their pages explicitly
+        discovery = None
+        if page_names is None:
+            discovery = PageDiscovery.for_project(project, self.session, headers=self.headers, timeout=self.timeout, page_cache=self.page_cache)
+        pages = self.iter_project_pages(project, page_names, discovery)
+
+        with self.async_fetcher() if use_async else nullcontext() as fetcher:
+            return self._collect_pages(
+                project, pages, discovery, fetcher, run_timer, on_result, doc_text,
+                auto_ticket=auto_ticket, check_links=check_links, incremental=incremental, head_only=head_only
+            )
+
+    def _collect_pages(self, project, pages, discovery, fetcher, run_timer, on_result, doc_text, auto_ticket, check_links, incremental, head_only):
         results = []
-        
-        google_doc_url = project.get('google_doc_url')
-        doc_text = self.doc_parser.fetch_text_public(google_doc_url) if google_doc_url else None
+        if doc_text is None:
+            with run_timer.stage('doc'):
+                doc_text = self.fetch_doc_text(project.get('google_doc_url'), fetcher)
         target_seo = self.doc_parser.extract_seo_metadata(doc_text) if doc_text else None
-        
-        for page_name, url in project.get('live_pages', {}).items():
-            page_issues = []
-            soup = self.fetch_live_soup(url)
-            if not soup:
+
+        # Bad and required phrases are compiled into one automaton for the whole run
+        rules = project.get('rules', {})
+        phrase_matcher = PhraseMatcher(
+            rules.get('bad_phrases', []) + rules.get('required_phrases', []),
+            ignore_case=rules.get('phrase_ignore_case', False),
+            normalize_whitespace=rules.get('phrase_normalize_whitespace', False)
+        )
+
+        # Head-only and streaming soups are reduced documents holding just the head
+        # metadata and links: DOM checks would pass vacuously and selectors would be made up
+        metadata_only = head_only or self.parser_backend == 'streaming'
+        if metadata_only and rules.get('dom_checks'):
+            logger.warning(f"Skipping dom_checks {rules['dom_checks']}: they need the full page, not a head-only or streaming parse.")
+
+        # Run-wide inputs shared by every page worker
+        run = {
+            "project": project,
+            "doc_text": doc_text,
+            "doc_metrics": self.doc_parser.find_metrics_block(doc_text) if doc_text else [],
+            "target_seo": target_seo,
+            "phrase_matcher": phrase_matcher,
+            "dom_pipeline": DomPipeline() if metadata_only else DomPipeline.for_rules(rules),
+            "auto_ticket": auto_ticket,
+            "check_links": check_links,
+            "metadata_only": metadata_only,
+            "head_only": head_only,
+            "state": None,
+            "context_hash": None,
+            "discovery": discovery,
+            "fetcher": fetcher,
+            # Discovered sites are also fetched at discover.requests_per_second
+            "rate_limiter": discovery.rate_limiter if discovery else None
+        }
+        if run["metadata_only"] and not head_only:
+            logger.info("Streaming html_parser: running SEO metadata and link checks only.")
+        if incremental:
+            run["state"] = IncrementalState(os.path.join(self.base_path, ".cache", "incremental", f"{project['id']}.json"))
+            run["context_hash"] = fingerprint(normalize_text(doc_text), project.get('rules', {}), run["metadata_only"])
+
+        # Pages are independent, so fetch and check them in parallel. Results come
+        # back in submission order, keeping config order for the report, and pages
+        # are pulled from the (possibly discovered) page stream only as workers free up.
+        with run_timer.stage('page_checks'), ThreadPoolExecutor(max_workers=self.max_page_workers) as executor:
+            for result in self._map_bounded(
+                executor,
+                lambda page: self._check_project_page(run, *page),
+                self._page_sources(run, pages),
+                window=self.max_page_workers * 2
+            ):
+                results.append(result)
+                if on_result:
+                    on_result(result)
+        if not results:
+            logger.warning(f"Project {project['name']} has no live_pages configured.")
+            return []
+
+        if check_links:
+            self.link_cache.save()
+        if run["state"]:
+            run["state"].save()
+            reused = sum(1 for r in results if r.get('reused'))
+            logger.info(f"Incremental run: {reused}/{len(results)} pages unchanged since last run")
+        return results
+
+    def record_results(self, project_id, project_name, results, run_timings=None, options=None):
+        """Stores a finished run's results in the results store in one go (ad-hoc and --all runs)."""
+        if not self.results_store:
+            return None
+        run_id = self.results_store.start_run(project_id, project_name, options)
+        for result in results:
+            self.results_store.add_page(run_id, project_id, result)
+        self.results_store.finish_run(run_id, run_timings)
+        return run_id
+
+    def iter_project_pages(self, project, page_names=None, discovery=None):
+        """
+        Yields (page_name, url) for the project's live_pages (only those in
+        page_names, if given), then any pages found by discovery.
+        """
+        configured = project.get('live_pages', {})
+        wanted = set(page_names) if page_names is not None else None
+        for page_name, url in configured.items():
+            if wanted is None or page_name in wanted:
+                yield page_name, url
+        if discovery:
+            for url in discovery.pages(skip=configured.values()):
+                yield urlparse(url).path or "/", url
+
+    @staticmethod
+    def _page_sources(run, pages):
+        """
+        Yields (page_name, url, crawled, pending) for the page workers as _map_bounded
+        pulls each page into its window, in sync and --async runs alike.
+
+        Pages the crawl already downloaded aren't fetched a second time: crawled is
+        that body. Otherwise, in --async runs, the page's download starts on the
+        event loop now (pending), so at most a window's worth of bodies is held.
+        """
+        discovery, fetcher = run["discovery"], run["fetcher"]
+        for page_name, url in pages:
+            crawled = discovery.take_body(url) if discovery else None
+            pending = fetcher.fetch_page(url, run["rate_limiter"]) if fetcher and crawled is None else None
+            yield page_name, url, crawled, pending
+
+    @staticmethod
+    def _map_bounded(executor, fn, items, window):
+        """
+        Like executor.map, but pulls items lazily and keeps at most `window` calls
+        in flight. Results still come back in item order; ones that finish behind
+        a slow item are buffered so they don't hold up the next submissions.
+        """
+        fn = in_run_context(fn)
+        in_flight = {}
+        finished = {}
+        next_index = 0
+        for index, item in enumerate(items):
+            in_flight[executor.submit(fn, item)] = index
+            while len(in_flight) >= window:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished[in_flight.pop(future)] = future
+            while next_index in finished:
+                yield finished.pop(next_index).result()
+                next_index += 1
+        finished.update((index, future) for future, index in in_flight.items())
+        while next_index in finished:
+            yield finished.pop(next_index).result()
+            next_index += 1
+
+    @staticmethod
+    def _resolve_head_only(head_only, check_links, use_async):
+        """Head-only runs stop reading before the links and use the streaming sync fetch."""
+        if not head_only:
+            return check_links, use_async
+        if check_links:
+            logger.warning("--head-only stops reading before the page links; skipping link checks.")
+        if use_async:
+            logger.warning("--head-only uses streaming sync fetches; ignoring --async.")
+        return False, False
+
+    def _check_project_page(self, run, page_name, url, crawled=None, pending=None):
+        """
+        Run every configured check against a single project page.
+        crawled is the body discovery already downloaded, and pending an
+        AsyncFetcher.fetch_page future, if either was started for the page.
+        """
+        result = {"page_name": page_name, "url": url, "issues": []}
+        timer = StageTimer(label=url)
+        try:
+            self._collect_page_issues(run, result, timer, crawled, pending)
+        except Exception as e:
+            # A crash on one page must not take down the rest of the run
+            logger.error(f"QA check failed for {url}: {e}")
+            result['issues'].append(f"QA check error: {e}")
+        finally:
+            if run["discovery"]:
+                # A crawl waiting on this page's body (see PageDiscovery.seed) fetches it itself
+                run["discovery"].seed(url, None)
+        result['timings'] = timer.as_dict()
+        return result
+
+    def _collect_page_issues(self, run, result, timer, crawled=None, pending=None):
+        url = result['url']
+        page_issues = result['issues']
+        state = run["state"]
+        body_hash = None
+        if run["head_only"]:
+            if crawled is not None:
+                with timer.stage('parse'):
+                    soup = make_soup(crawled, 'streaming')
+            else:
+                if run["rate_limiter"]:
+                    run["rate_limiter"].acquire()
+                soup = self.fetch_head_soup(url, timer)
+        else:
+            if crawled is not None:
+                fetched = (crawled, False)
+            elif pending is not None:
+                fetched = self.await_async_page(pending, timer)
+            else:
+                if run["rate_limiter"]:
+                    run["rate_limiter"].acquire()
+                fetched = self.fetch_live_body(url, timer)
+            if fetched is None:
                 page_issues.append(f"Could not reach page: {url}")
-                results.append({"page_name": page_name, "url": url, "issues": page_issues})
-                continue
+                return
+            if run["discovery"] and crawled is None:
+                run["discovery"].seed(url, fetched[0])
+            if state:
+                # A byte-identical body (e.g. a 304 from the page cache) skips parsing and the DOM walk entirely
+                body_hash = fingerprint(run["context_hash"], fetched[0])
+                previous = state.lookup(url, body_hash, key='body_fingerprint', ticketed=run["auto_ticket"])
+                if previous is not None:
+                    result['reused'] = True
+                    page_issues.extend(previous['issues'])
+                    self._check_links(run, result, timer, previous.get('links') or [])
+                    return
+            soup = self.parse_live_body(url, *fetched, timer=timer)
+        if not soup:
+            page_issues.append(f"Could not reach page: {url}")
+            return
+
+        # One DOM walk finds the SEO elements, links, opt-in DOM checks and the page text
+        with timer.stage('dom_scan'):
+            scan = run["dom_pipeline"].run(soup)
+
+        # Normalized once, then shared by every text check on the page
+        with timer.stage('text_index'):
+            content = PageTextIndex(scan.text)
 
-            content = soup.get_text()
+        page_hash = None
+        if state:
+            page_hash = fingerprint(run["context_hash"], normalize_text(content.raw), self._head_snapshot(scan), scan.issues())
+            # A --ticket run only reuses issues that were ticketed when they were found
+            previous = state.lookup(url, page_hash, ticketed=run["auto_ticket"])
+            if previous is not None:
+                # Unchanged page, doc and rules: reuse last run's content issues
+                result['reused'] = True
+                page_issues.extend(previous['issues'])
 
-            # SEO METADATA
-            if target_seo:
-                page_issues.extend(self.check_seo_metadata(soup, target_seo, page_name, page_url=url, project_id=project.get('bugherd_project_id'), auto_ticket=auto_ticket))
+        if not result.get('reused'):
+            page_issues.extend(self._run_content_checks(run, result['page_name'], url, soup, scan, content, timer))
+        if state:
+            state.record(
+                url, page_hash, page_issues, body_fingerprint=body_hash, links=scan.get('links'),
+                ticketed=run["auto_ticket"] or bool(previous and previous.get('ticketed'))
+            )
 
-            # BAD PHRASES
-            rules = project.get('rules', {})
+        self._check_links(run, result, timer, scan.get('links'))
+
+    def _check_links(self, run, result, timer, links):
+        """Link health can change independently of page content, so links are always re-checked."""
+        if not run["check_links"]:
+            return
+        result['link_stats'] = {}
+        result['link_statuses'] = []
+        with timer.stage('links'):
+            broken = self.check_page_links(result['url'], links, result['link_stats'], result['link_statuses'], run["fetcher"])
+        result['broken_links'] = broken
+        if broken:
+            result['issues'].append(f"Broken links: {', '.join(broken)}")
+
+    @staticmethod
+    def _head_snapshot(scan):
+        """The metadata the SEO checks read that the page text does not cover."""
+        desc = scan.get('meta_description')
+        return desc.get('content', '') if desc else ''
+
+    def _run_content_checks(self, run, page_name, url, soup, scan, content, timer):
+        """scan is the page's DomScan and content its PageTextIndex, shared by every check."""
+        project = run["project"]
+        auto_ticket = run["auto_ticket"]
+        issues = []
+
+        # SEO METADATA
+        if run["target_seo"]:
+            with timer.stage('seo'):
+                issues.extend(self.check_seo_metadata(
+                    soup, run["target_seo"], page_name, page_url=url, project_id=project.get('bugherd_project_id'),
+                    auto_ticket=auto_ticket, scan=scan, locate=not run["metadata_only"]
+                ))
+
+        # OPT-IN DOM CHECKS (rules['dom_checks'], e.g. images_alt, headings)
+        issues.extend(scan.issues())
+
+        # The streaming parser keeps only head metadata and links, so body text checks can't run
+        if run["metadata_only"]:
+            return issues
+
+        # BAD / REQUIRED PHRASES - one pass over the page finds every phrase
+        rules = project.get('rules', {})
+        matcher = run["phrase_matcher"]
+        with timer.stage('phrases'):
+            search_text = matcher.search_text(content.raw)
+            found = matcher.scan(search_text)
             for phrase in rules.get('bad_phrases', []):
-                if phrase in content:
-                    issue_msg = f"Found copy error: '{phrase}'"
-                    page_issues.append(issue_msg)
+                occurrences = found.get(phrase)
+                if occurrences:
+                    context = matcher.snippet(search_text, *occurrences[0])
+                    issue_msg = f"Found copy error: '{phrase}' ({len(occurrences)}x, first in \"{context}\")"
+                    issues.append(issue_msg)
                     if auto_ticket:
-                        self.bh_client.create_ticket(project.get('bugherd_project_id'), issue_msg, page_url=url)
+                        self.ticket_outbox.add(project.get('bugherd_project_id'), f"Copy error: {phrase}", issue_msg, page_url=url)
 
-            # METRICS
-            if doc_text:
-                doc_metrics = self.find_metrics_in_content(doc_text, content)
-                for metric, found in doc_metrics.items():
-                    if not found:
-                        issue_msg = f"Metric '{metric}' missing or mismatch."
-                        page_issues.append(issue_msg)
-                        if auto_ticket:
-                            self.bh_client.create_ticket(project.get('bugherd_project_id'), issue_msg, page_url=url)
-
-            # LINKS
-            if check_links:
-                broken = self.link_checker.check_page_links(url)
-                if broken:
-                    page_issues.append(f"Broken links: {', '.join(broken)}")
+            for phrase in rules.get('required_phrases', []):
+                if phrase.strip() and phrase not in found:
+                    issue_msg = f"Required phrase missing: '{phrase}'"
+                    issues.append(issue_msg)
+                    if auto_ticket:
+                        self.ticket_outbox.add(project.get('bugherd_project_id'), f"Required phrase missing: {phrase}", issue_msg, page_url=url)
 
-            results.append({"page_name": page_name, "url": url, "issues": page_issues})
+        # METRICS
+        with timer.stage('metrics'):
+            for metric in run["doc_metrics"]:
+                if not self.doc_parser.fuzzy_match(metric, content):
+                    issue_msg = f"Metric '{metric}' missing or mismatch."
+                    issues.append(issue_msg)
+                    if auto_ticket:
+                        self.ticket_outbox.add(project.get('bugherd_project_id'), f"Metric mismatch: {metric}", issue_msg, page_url=url)
 
-        self.report_gen.generate_html_report(project['name'], results)
-        return all(not r['issues'] for r in results)
+        return issues
 
     def find_metrics_in_content(self, doc_text, live_content):
+        """live_content may be a string or a PageTextIndex."""
         doc_metrics = self.doc_parser.find_metrics_block(doc_text)
         results = {}
         for metric in doc_metrics:
@@ -232,19 +745,43 @@ class BugHerdEngine:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="auto-bugherd QA Engine")
     parser.add_argument("project", nargs="?", help="Project ID from config.json")
+    parser.add_argument("--all", dest="all_projects", action="store_true", help="Run every configured project across a process pool and write a combined summary")
+    parser.add_argument("--processes", type=int, help="Worker processes for --all (default: max_project_processes setting, else CPU count)")
+    parser.add_argument("--pages-per-process", type=int, default=0, help="With --all, split projects with more pages than this across processes")
     parser.add_argument("--url", help="Ad-hoc URL to check")
     parser.add_argument("--doc-url", help="Google Doc URL for comparison")
     parser.add_argument("--ticket", action="store_true", help="Auto-create BugHerd tickets")
     parser.add_argument("--check-links", action="store_true", help="Check for broken links on the page")
     parser.add_argument("--project-id", help="BugHerd Project ID (required for ad-hoc ticketing)")
+    parser.add_argument("--incremental", action="store_true", help="Reuse last run's issues for pages whose content, doc and rules are unchanged")
+    parser.add_argument("--head-only", action="store_true", help="Only check SEO title, description and H1, streaming each page until </head> and the first <h1>")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Fetch pages, the doc and links on one asyncio event loop (requires aiohttp)")
+    parser.add_argument("--report-formats", help="Comma-separated report formats: html, jsonl, junit (default: report_formats setting)")
+    parser.add_argument("--profile", action="store_true", help="Write a cProfile dump of the run to reports/profiles/")
+    parser.add_argument("--trace", action="store_true", help="With --profile, also write a Chrome trace (chrome://tracing, ui.perfetto.dev) of every page stage")
 
     args = parser.parse_args()
+    if args.trace:
+        args.profile = True
     engine = BugHerdEngine()
+    if args.report_formats:
+        engine.report_gen = ReportGenerator(output_dir=engine.report_gen.output_dir, formats=args.report_formats.split(","))
 
     if args.url:
-        success = engine.run_qa_ad_hoc(args.url, doc_url=args.doc_url, auto_ticket=args.ticket, project_id=args.project_id, check_links=args.check_links)
+        with engine.profiler("adhoc", trace=args.trace) if args.profile else nullcontext():
+            success = engine.run_qa_ad_hoc(args.url, doc_url=args.doc_url, auto_ticket=args.ticket, project_id=args.project_id, check_links=args.check_links, use_async=args.use_async, head_only=args.head_only)
+    elif args.all_projects:
+        from .project_pool import run_all_projects
+        # Each worker process profiles its own shards
+        success = run_all_projects(
+            engine, processes=args.processes, pages_per_process=args.pages_per_process,
+            profile=args.profile, trace=args.trace,
+            auto_ticket=args.ticket, check_links=args.check_links, use_async=args.use_async,
+            incremental=args.incremental, head_only=args.head_only
+        )
     elif args.project:
-        success = engine.run_qa_project(args.project, auto_ticket=args.ticket, check_links=args.check_links)
+        with engine.profiler(f"project_{args.project}", trace=args.trace) if args.profile else nullcontext():
+            success = engine.run_qa_project(args.project, auto_ticket=args.ticket, check_links=args.check_links, use_async=args.use_async, incremental=args.incremental, head_only=args.head_only)
     else:
         parser.print_help()
         sys.exit(1)
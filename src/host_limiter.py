@@ -0,0 +1,199 @@
+import random
+import threading
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean "slow down", not "this link is broken"
+THROTTLE_STATUSES = (429, 503)
+
+class HostLimiter:
+    """
+    Per-host politeness for outbound link checks.
+
+    - Caps concurrent requests to any single host.
+    - Computes exponential backoff delays, honouring Retry-After when present.
+    - Opens a circuit breaker for a host after repeated throttle responses,
+      timeouts or connection errors so the rest of its links are skipped
+      (reported as unverified) until a cooldown passes. Then a single probe
+      request is let through: the circuit closes if it succeeds and re-opens
+      for another cooldown if it fails.
+
+    after_attempt() and link_result() hold the retry decisions, so the sync
+    LinkChecker and the AsyncFetcher only make the requests and sleep:
+
+        if not limiter.allow(url): ...          # circuit open: unverified
+        attempt = 0
+        while True:
+            status, result, retry_after = request(url)
+            delay = limiter.after_attempt(url, attempt, status, retry_after)
+            if delay is None:
+                return limiter.link_result(url, status, result)
+            sleep(delay)
+            attempt += 1
+    """
+
+    def __init__(self, max_per_host=4, max_retries=3, backoff_base=1.0, backoff_max=30.0,
+                 breaker_threshold=5, breaker_cooldown=60.0):
+        self.max_per_host = max(1, int(max_per_host))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.breaker_threshold = max(1, int(breaker_threshold))
+        self.breaker_cooldown = float(breaker_cooldown)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._failures = {}
+        self._opened_at = {}
+        self._probing = set()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            max_per_host=settings.get('link_max_per_host', 4),
+            max_retries=settings.get('link_max_retries', 3),
+            backoff_base=settings.get('link_backoff_base', 1.0),
+            backoff_max=settings.get('link_backoff_max', 30.0),
+            breaker_threshold=settings.get('link_breaker_threshold', 5),
+            breaker_cooldown=settings.get('link_breaker_cooldown', 60.0)
+        )
+
+    @staticmethod
+    def host_of(url):
+        return urlparse(url).netloc.lower()
+
+    def slot(self, url):
+        """Returns the semaphore bounding concurrent requests to url's host. Use as a context manager."""
+        host = self.host_of(url)
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    def allow(self, url):
+        """False while the host's circuit is open. After the cooldown one probe is let through."""
+        host = self.host_of(url)
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if host in self._probing or time.time() - opened_at < self.breaker_cooldown:
+                return False
+            # Half-open: everyone else waits for this probe's record_success/record_failure
+            self._probing.add(host)
+            return True
+
+    def record_success(self, url):
+        host = self.host_of(url)
+        with self._lock:
+            self._failures.pop(host, None)
+            self._probing.discard(host)
+            if self._opened_at.pop(host, None) is not None:
+                logger.info(f"Circuit closed for {host}")
+
+    def record_failure(self, url):
+        """Records a throttle response, timeout or connection error from url's host."""
+        host = self.host_of(url)
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if host in self._probing:
+                # The half-open probe failed: stay open for another cooldown
+                self._probing.discard(host)
+                self._opened_at[host] = time.time()
+            elif self._failures[host] >= self.breaker_threshold and host not in self._opened_at:
+                self._opened_at[host] = time.time()
+                logger.warning(f"Circuit opened for {host} after {self._failures[host]} failed requests")
+
+    def after_attempt(self, url, attempt, status, retry_after=None):
+        """
+        Records the outcome of request attempt `attempt` (0-based) to url and
+        returns the seconds to wait before retrying, or None when that attempt's
+        result is final. status is None for timeouts and connection errors.
+        """
+        if status is None:
+            # Timeouts and connection errors are reported as broken, not retried,
+            # but count towards the host's circuit breaker
+            self.record_failure(url)
+            return None
+        if status not in THROTTLE_STATUSES:
+            self.record_success(url)
+            return None
+        self.record_failure(url)
+        if attempt >= self.max_retries or not self.allow(url):
+            return None
+        return self.backoff_delay(attempt, retry_after)
+
+    @staticmethod
+    def link_result(url, status, result):
+        """
+        (status, broken_message, verified) for a link's final attempt. A host that
+        was still throttling leaves the link unverified instead of broken.
+        """
+        if status in THROTTLE_STATUSES:
+            logger.warning(f"Could not verify {url}: host kept throttling (HTTP {status})")
+            return status, None, False
+        return status, result, True
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        delay = self.parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.backoff_base * (2 ** attempt)
+            delay += random.uniform(0, delay / 2)
+        return min(delay, self.backoff_max)
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Parses a Retry-After header (delta-seconds or HTTP date) into seconds, or None."""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = max(0.001, float(rate))
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Blocks until a token is available, then takes it."""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self):
+        """Takes a token if one is available and returns 0, else returns the seconds to wait before retrying."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def pause(self, seconds):
+        """Empties the bucket so no token is handed out for `seconds` (e.g. after a 429)."""
+        with self._lock:
+            self._refill()
+            # One token short of refilled exactly `seconds` from now
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
@@ -0,0 +1,138 @@
+import codecs
+import logging
+from html import escape
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# html.parser: pure-Python tree builder (always available)
+# lxml:        C-accelerated tree builder (pip install lxml)
+# streaming:   tokenizer that keeps only <head> metadata, the first <h1> and <a href> values
+PARSER_BACKENDS = ('html.parser', 'lxml', 'streaming')
+
+def resolve_backend(name):
+    """Validates a parser backend name, falling back to html.parser when it can't be used."""
+    name = name or 'html.parser'
+    if name not in PARSER_BACKENDS:
+        logger.warning(f"Unknown html_parser '{name}'. Using html.parser.")
+        return 'html.parser'
+    if name == 'lxml':
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            logger.warning("html_parser 'lxml' requested but lxml is not installed. Using html.parser.")
+            return 'html.parser'
+    return name
+
+def tree_backend(name):
+    """The tree builder to use where the full document is needed (e.g. Google Doc text)."""
+    return 'html.parser' if name == 'streaming' else name
+
+def make_soup(html, backend='html.parser'):
+    """
+    Parses html with the chosen backend.
+
+    The streaming backend returns a soup of a reduced document holding only the
+    title, meta description, first H1 and links, so it suits metadata and link
+    checks but not checks on the page's body text.
+    """
+    if backend == 'streaming':
+        scanner = HeadLinkScanner()
+        scanner.feed(html)
+        scanner.close()
+        return scanner.to_soup()
+    return BeautifulSoup(html, backend)
+
+def scan_head(chunks, encoding=None, max_bytes=1_000_000):
+    """
+    Feeds a stream of byte chunks to a HeadLinkScanner, stopping as soon as the
+    head has ended and the first <h1> is read, or once max_bytes have been read.
+
+    Returns (scanner, bytes_read, truncated) where truncated means the size limit
+    was hit before the metadata was complete.
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    scanner = HeadLinkScanner(collect_links=False)
+    bytes_read = 0
+    truncated = False
+    for chunk in chunks:
+        bytes_read += len(chunk)
+        scanner.feed(decoder.decode(chunk))
+        if scanner.complete:
+            break
+        if bytes_read >= max_bytes:
+            truncated = True
+            break
+    scanner.close()
+    return scanner, bytes_read, truncated
+
+class HeadLinkScanner(HTMLParser):
+    """
+    Streaming tokenizer that records <title>, <meta name="description">, the
+    first <h1> and every <a href> without building a tree. Can be fed in chunks.
+    """
+
+    def __init__(self, collect_links=True):
+        super().__init__(convert_charrefs=True)
+        self.collect_links = collect_links
+        self.title = None
+        self.meta_description = None
+        self.h1 = None
+        self.hrefs = []
+        self.head_closed = False
+        self._capture = None
+        self._parts = []
+
+    @property
+    def complete(self):
+        """True once the head has ended and the first H1 has been read."""
+        return self.head_closed and self.h1 is not None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and self.title is None and self._capture is None:
+            self._capture, self._parts = 'title', []
+        elif tag == 'h1' and self.h1 is None and self._capture is None:
+            self._capture, self._parts = 'h1', []
+        elif tag == 'meta' and self.meta_description is None:
+            attributes = dict(attrs)
+            if attributes.get('name') == 'description':
+                self.meta_description = attributes.get('content') or ''
+        elif tag == 'a' and self.collect_links:
+            href = dict(attrs).get('href')
+            if href is not None:
+                self.hrefs.append(href)
+        elif tag == 'body':
+            self.head_closed = True
+
+    def handle_endtag(self, tag):
+        if tag == self._capture:
+            setattr(self, tag, ''.join(self._parts))
+            self._capture = None
+        elif tag == 'head':
+            self.head_closed = True
+
+    def handle_data(self, data):
+        if self._capture:
+            self._parts.append(data)
+
+    def to_soup(self):
+        """BeautifulSoup of reduced_html(), small enough to parse in microseconds."""
+        return BeautifulSoup(self.reduced_html(), 'html.parser')
+
+    def reduced_html(self):
+        """A minimal document holding only what was captured."""
+        head = []
+        if self.title is not None:
+            head.append(f"<title>{escape(self.title)}</title>")
+        if self.meta_description is not None:
+            head.append(f'<meta name="description" content="{escape(self.meta_description)}">')
+        body = []
+        if self.h1 is not None:
+            body.append(f"<h1>{escape(self.h1)}</h1>")
+        body.extend(f'<a href="{escape(href)}"></a>' for href in self.hrefs)
+        return f"<html><head>{''.join(head)}</head><body>{''.join(body)}</body></html>"
@@ -0,0 +1,37 @@
+import requests
+from requests.adapters import HTTPAdapter
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONNECTIONS = 20
+DEFAULT_POOL_MAXSIZE = 50
+
+
+def create_session(settings=None):
+    """
+    Build the shared requests.Session used for every outbound call.
+
+    The adapter keeps one urllib3 connection pool per host, so repeated requests
+    to the same origin (the client's own site, docs.google.com, the BugHerd API)
+    reuse warm keep-alive connections instead of paying a TCP+TLS handshake each time.
+
+    Args:
+        settings: The `settings` block from config.json. Reads `user_agent`,
+            `http_pool_connections` (number of hosts to keep pools for) and
+            `http_pool_maxsize` (connections kept alive per host).
+    """
+    settings = settings or {}
+    pool_connections = int(settings.get('http_pool_connections', DEFAULT_POOL_CONNECTIONS))
+    pool_maxsize = int(settings.get('http_pool_maxsize', DEFAULT_POOL_MAXSIZE))
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if settings.get('user_agent'):
+        session.headers['User-Agent'] = settings['user_agent']
+
+    logger.debug(f"HTTP session ready (pools={pool_connections}, per-host={pool_maxsize})")
+    return session
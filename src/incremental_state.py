@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import logging
+
+from .file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+def fingerprint(*parts):
+    """Stable sha256 over strings, or JSON-serialisable values, joined with a separator."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, sort_keys=True, default=str)
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+def normalize_text(text):
+    """Collapses whitespace so formatting-only changes don't invalidate a page."""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+class IncrementalState:
+    """
+    Per-project record of each page's content fingerprint and the issues it produced.
+
+    In --incremental mode a page whose fingerprint (page content + Google Doc
+    text + project rules) matches the last run reuses its stored issues instead
+    of running the content checks again. A body fingerprint (raw body + doc +
+    rules) lets an unchanged body skip parsing too, using the stored links.
+    Entries remember whether their issues were ticketed, so a --ticket run
+    doesn't reuse issues found by a run that filed nothing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._recorded = {}
+        self._pages = self._read()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable incremental state {self.path}: {e}")
+            return {}
+
+    def lookup(self, url, page_fingerprint, key='fingerprint', ticketed=False):
+        """
+        Returns the stored entry (issues, links, ticketed) for url if its `key`
+        fingerprint is unchanged, else None. With ticketed=True, entries whose
+        issues were not ticketed don't count as a match.
+        """
+        with self._lock:
+            entry = self._pages.get(url)
+        if not entry or not page_fingerprint or entry.get(key) != page_fingerprint:
+            return None
+        if ticketed and not entry.get('ticketed'):
+            return None
+        return dict(entry, issues=list(entry['issues']))
+
+    def record(self, url, page_fingerprint, issues, body_fingerprint=None, links=None, ticketed=False):
+        entry = {
+            "fingerprint": page_fingerprint,
+            "body_fingerprint": body_fingerprint,
+            "issues": list(issues),
+            "links": list(links or []),
+            "ticketed": bool(ticketed)
+        }
+        with self._lock:
+            self._pages[url] = entry
+            self._recorded[url] = entry
+
+    def save(self):
+        """
+        Writes this run's entries over the current file, so processes checking
+        different pages of the same project (--all) don't drop each other's.
+        The read-merge-replace holds a file lock shared across processes.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with self._lock, file_lock(self.path):
+                pages = self._read()
+                pages.update(self._recorded)
+                with open(tmp_path, 'w') as f:
+                    json.dump(pages, f)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save incremental state: {e}")
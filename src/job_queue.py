@@ -0,0 +1,295 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+# Columns added after the first release, created on open if missing
+_COLUMNS = {
+    "coalesce_key": "TEXT",
+    "not_before": "REAL NOT NULL DEFAULT 0",
+    "sealed": "INTEGER NOT NULL DEFAULT 0",
+    "heartbeat_at": "REAL"
+}
+
+class JobQueue:
+    """
+    Durable FIFO of jobs in a local SQLite file.
+
+    Jobs survive restarts, and several processes (e.g. gunicorn workers) can
+    share one file. A running job holds a lease that its JobWorkers renew
+    every few seconds; a job whose lease is older than `lease_seconds` was left
+    by a crashed process and is re-queued. Claims are atomic, so a job runs in
+    one process only. `max_pending` bounds queued + running jobs so callers
+    can apply backpressure when enqueue() reports the queue full.
+
+    Jobs enqueued with a coalesce key are debounced: a later job with the same
+    key merges into the queued one and pushes its start back, or attaches to
+    it while it is running (see seal()).
+    """
+
+    def __init__(self, path, max_pending=100, keep_finished=1000, lease_seconds=60, poll_interval=1.0):
+        self.path = path
+        self.max_pending = max(1, int(max_pending))
+        self.keep_finished = max(0, int(keep_finished))
+        self.lease_seconds = max(1.0, float(lease_seconds))
+        # Jobs enqueued by other processes don't wake this one's workers, so claim() polls
+        self.poll_interval = max(0.05, float(poll_interval))
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        existing = {row['name'] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, definition in _COLUMNS.items():
+            if column not in existing:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_coalesce ON jobs (coalesce_key, status)")
+        self.requeue_expired()
+
+    @contextmanager
+    def _transaction(self):
+        """Holds the thread lock and an IMMEDIATE transaction, so other processes can't write in between."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def requeue_expired(self):
+        """Re-queues running jobs whose lease ran out: their process died without finishing them."""
+        with self._lock:
+            requeued = self._db.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, heartbeat_at = NULL, sealed = 0 "
+                "WHERE status = 'running' AND COALESCE(heartbeat_at, started_at, 0) < ?",
+                (time.time() - self.lease_seconds,)
+            ).rowcount
+            if requeued:
+                self._available.notify_all()
+        if requeued:
+            logger.info(f"Re-queued {requeued} job(s) whose worker stopped renewing its lease")
+        return requeued
+
+    def renew(self, job_ids):
+        """Renews the lease of running jobs this process is working on."""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND id IN ({','.join('?' * len(job_ids))})",
+                [time.time()] + job_ids
+            )
+
+    def _pending_count(self):
+        return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+
+    def enqueue(self, payload, key=None, delay=0, max_delay=None, merge=None):
+        """
+        Adds a job and returns (job_id, disposition).
+
+        disposition is 'queued' for a new job, 'coalesced' when it merged into a
+        queued job with the same key, 'attached' when it merged into a running
+        one, or 'full' (with job_id None) when the queue has no room.
+
+        delay holds a new job back for that many seconds; each coalesced job
+        resets the delay, but never past max_delay after the first one arrived.
+        merge(existing_payload, payload) returns the combined payload
+        (default: keep the newer payload).
+        """
+        merge = merge or (lambda existing, new: new)
+        now = time.time()
+        with self._transaction():
+            if key is not None:
+                row = self._db.execute(
+                    "SELECT id, payload, status, created_at FROM jobs WHERE coalesce_key = ? "
+                    "AND (status = 'queued' OR (status = 'running' AND sealed = 0)) "
+                    "ORDER BY status = 'queued' DESC, id DESC LIMIT 1",
+                    (key,)
+                ).fetchone()
+                if row:
+                    merged = json.dumps(merge(json.loads(row['payload']), payload))
+                    if row['status'] == 'queued':
+                        not_before = now + delay
+                        if max_delay is not None:
+                            not_before = min(not_before, row['created_at'] + max_delay)
+                        self._db.execute(
+                            "UPDATE jobs SET payload = ?, not_before = ? WHERE id = ?", (merged, not_before, row['id'])
+                        )
+                        self._available.notify()
+                        return row['id'], 'coalesced'
+                    self._db.execute("UPDATE jobs SET payload = ? WHERE id = ?", (merged, row['id']))
+                    return row['id'], 'attached'
+
+            if self._pending_count() >= self.max_pending:
+                return None, 'full'
+            job_id = self._db.execute(
+                "INSERT INTO jobs (payload, created_at, coalesce_key, not_before) VALUES (?, ?, ?, ?)",
+                (json.dumps(payload), now, key, now + delay)
+            ).lastrowid
+            self._available.notify()
+        return job_id, 'queued'
+
+    def claim(self, timeout=None):
+        """
+        Marks the oldest queued job whose delay has passed as running and returns
+        (job_id, payload), waiting up to timeout seconds. None if there is none.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = time.time()
+                row = self._db.execute(
+                    "SELECT id, payload FROM jobs WHERE status = 'queued' AND not_before <= ? ORDER BY id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row:
+                    # Only one process wins the job; the others see rowcount 0 and look again
+                    claimed = self._db.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ? WHERE id = ? AND status = 'queued'",
+                        (now, now, row['id'])
+                    ).rowcount
+                    if claimed:
+                        return row['id'], json.loads(row['payload'])
+                    continue
+
+                # Sleep until the next debounced job is due, a new job arrives, the
+                # poll interval passes (for jobs from other processes), or the timeout
+                wait = self.poll_interval
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return None
+                next_due = self._db.execute(
+                    "SELECT MIN(not_before) FROM jobs WHERE status = 'queued'"
+                ).fetchone()[0]
+                if next_due is not None:
+                    wait = min(wait, max(0.0, next_due - now))
+                self._available.wait(wait)
+
+    def seal(self, job_id):
+        """
+        Stops further jobs attaching to a running job and returns its final
+        payload, including everything attached while it ran.
+        """
+        with self._transaction():
+            self._db.execute("UPDATE jobs SET sealed = 1 WHERE id = ?", (job_id,))
+            row = self._db.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row['payload']) if row else None
+
+    def complete(self, job_id, result=None):
+        self._finish(job_id, 'done', result=result)
+
+    def fail(self, job_id, error):
+        self._finish(job_id, 'failed', error=str(error))
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                (status, time.time(), json.dumps(result) if result is not None else None, error, job_id)
+            )
+            # Keep the table small: drop the oldest finished jobs beyond keep_finished
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND id NOT IN "
+                "(SELECT id FROM jobs WHERE status IN ('done', 'failed') ORDER BY id DESC LIMIT ?)",
+                (self.keep_finished,)
+            )
+
+    def get(self, job_id):
+        """Status record for a job as a dict, or None if unknown."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def counts(self):
+        """Number of jobs in each status."""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+class JobWorkers:
+    """
+    Fixed pool of daemon threads that claim jobs from a JobQueue and run
+    handler(job_id, payload) on them. A heartbeat thread renews the leases of
+    the jobs they are running and re-queues jobs abandoned by dead processes.
+    """
+
+    def __init__(self, queue, handler, concurrency=2):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = max(1, int(concurrency))
+        self._threads = []
+        self._running = set()
+        self._running_lock = threading.Lock()
+
+    def start(self):
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._work, name=f"qa-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="qa-worker-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        logger.info(f"Started {self.concurrency} QA worker(s)")
+
+    def _work(self):
+        while True:
+            job = self.queue.claim()
+            if job is None:
+                continue
+            job_id, payload = job
+            with self._running_lock:
+                self._running.add(job_id)
+            try:
+                self.queue.complete(job_id, self.handler(job_id, payload))
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                self.queue.fail(job_id, e)
+            finally:
+                with self._running_lock:
+                    self._running.discard(job_id)
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.queue.lease_seconds / 4)
+            try:
+                with self._running_lock:
+                    running = list(self._running)
+                self.queue.renew(running)
+                self.queue.requeue_expired()
+            except Exception as e:
+                logger.warning(f"Could not renew job leases: {e}")
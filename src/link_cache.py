@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+import logging
+
+from .file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+# Seconds a link result stays valid across runs, keyed by status class.
+# 0 means "re-check on the next run" (results are still shared across pages within a run).
+DEFAULT_TTLS = {
+    "2xx": 86400,
+    "3xx": 86400,
+    "4xx": 0,
+    "5xx": 0,
+    "error": 0
+}
+
+class LinkStatusCache:
+    """
+    Link status cache shared by every page in a run and persisted between runs.
+
+    Entries checked during the current run are always reused, so shared header,
+    footer and nav links are only requested once per run. Entries from earlier
+    runs are reused while younger than the TTL for their status class. A
+    long-lived owner (e.g. the webhook listener's engine) calls start_run()
+    before each run so the previous run's results count as earlier runs.
+
+    --all workers checking slices of one run call share() with a mapping owned
+    by the parent (a multiprocessing.Manager dict), so a link one worker has
+    checked is reused by the others instead of being requested once per worker.
+    """
+
+    def __init__(self, path=None, ttls=None):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.run_started = time.time()
+        self._entries = {}
+        self._shared = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def start_run(self):
+        """Marks the start of a new run: entries checked before now are subject to their TTL again."""
+        self.run_started = time.time()
+
+    def share(self, shared, run_started):
+        """
+        Also reads and writes entries through `shared`, a mapping other processes
+        of the same run use too. run_started is the run's start time in the
+        parent, so entries any of them checked count as this run's.
+        """
+        self._shared = shared
+        self.run_started = run_started
+
+    @staticmethod
+    def status_class(status):
+        if not status:
+            return "error"
+        return f"{status // 100}xx"
+
+    def _load(self):
+        self._entries = self._read()
+        if self._entries:
+            logger.info(f"Loaded {len(self._entries)} cached link statuses from {self.path}")
+
+    def _read(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable link cache {self.path}: {e}")
+            return {}
+
+    def get(self, url):
+        """
+        Returns the cached entry for url if still fresh, else None.
+        An entry is a dict with status, result (broken-link message or None) and checked_at.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+        if self._fresh(entry):
+            return entry
+        if self._shared is not None:
+            entry = self._shared.get(url)
+            if self._fresh(entry):
+                with self._lock:
+                    self._entries[url] = entry
+                return entry
+        return None
+
+    def _fresh(self, entry):
+        if not entry:
+            return False
+        if entry['checked_at'] >= self.run_started:
+            return True
+        ttl = self.ttls.get(self.status_class(entry.get('status')), 0)
+        return time.time() - entry['checked_at'] < ttl
+
+    def set(self, url, status, result):
+        entry = {"status": status, "result": result, "checked_at": time.time()}
+        with self._lock:
+            self._entries[url] = entry
+        if self._shared is not None:
+            self._shared[url] = entry
+
+    def save(self):
+        """
+        Merges entries still within their TTL into the file on disk, keeping the
+        newest check of each URL. Other processes (--all workers) saving at the
+        same time wait on a shared file lock, so none of their entries are lost.
+        """
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with file_lock(self.path):
+                entries = self._read()
+                with self._lock:
+                    for url, entry in self._entries.items():
+                        if url not in entries or entries[url]['checked_at'] < entry['checked_at']:
+                            entries[url] = entry
+                now = time.time()
+                keep = {
+                    url: entry for url, entry in entries.items()
+                    if now - entry['checked_at'] < self.ttls.get(self.status_class(entry.get('status')), 0)
+                }
+                with open(tmp_path, 'w') as f:
+                    json.dump(keep, f)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save link cache: {e}")
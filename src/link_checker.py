@@ -1,14 +1,26 @@
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
 import logging
+from .host_limiter import HostLimiter, THROTTLE_STATUSES
+from .html_parser import make_soup
+from .metrics import HTTP_ERRORS
+from .profiler import in_run_context
 
 logger = logging.getLogger(__name__)
 
 class LinkChecker:
-    def __init__(self, user_agent, timeout=5, max_workers=10):
+    def __init__(self, user_agent, timeout=5, max_workers=10, session=None, cache=None, limiter=None, parser_backend='html.parser'):
         self.headers = {'User-Agent': user_agent}
+        self.session = session or requests.Session()
+        self.cache = cache
+        self.limiter = limiter or HostLimiter()
+        self.parser_backend = parser_backend
+        # Checks currently running, so concurrent pages sharing a link wait for one request
+        self._inflight = {}
+        self._inflight_lock = threading.RLock()
         self.timeout = timeout
         self.max_workers = max_workers
         self.ignored_domains = ['facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com', 'youtube.com']
@@ -18,60 +30,161 @@ class LinkChecker:
         domain = parsed.netloc.lower()
         return any(social in domain for social in self.ignored_domains)
 
-    def _check_single_link(self, absolute_url):
+    def _request_link(self, absolute_url):
+        """Returns (status_code, broken_message, retry_after) for one attempt; status_code is None on errors."""
         try:
             # HEAD request is faster than GET
-            res = requests.head(absolute_url, headers=self.headers, timeout=self.timeout, allow_redirects=True)
-            if res.status_code >= 400:
+            res = self.session.head(absolute_url, headers=self.headers, timeout=self.timeout, allow_redirects=True)
+            if res.status_code >= 400 and res.status_code not in THROTTLE_STATUSES:
                 # Retry with GET as some servers block HEAD
-                res = requests.get(absolute_url, headers=self.headers, timeout=self.timeout)
-                if res.status_code >= 400:
-                    return f"{absolute_url} ({res.status_code})"
-            return None
+                res = self.session.get(absolute_url, headers=self.headers, timeout=self.timeout)
+            if res.status_code >= 400:
+                HTTP_ERRORS.inc(target='link', status=res.status_code)
+                return res.status_code, f"{absolute_url} ({res.status_code})", res.headers.get('Retry-After')
+            return res.status_code, None, None
         except Exception as e:
-            return f"{absolute_url} (Error: {str(e)})"
+            HTTP_ERRORS.inc(target='link', status='error')
+            return None, f"{absolute_url} (Error: {str(e)})", None
 
-    def check_page_links(self, url):
+    def _probe_link(self, absolute_url):
+        """
+        Returns (status_code, broken_message, verified) for a single link.
+        Throttle responses (429/503) are retried with backoff; if the host keeps
+        throttling, or its circuit is open, the link is reported as unverified
+        instead of broken.
+        """
+        limiter = self.limiter
+        if not limiter.allow(absolute_url):
+            return None, None, False
+
+        attempt = 0
+        while True:
+            with limiter.slot(absolute_url):
+                status, result, retry_after = self._request_link(absolute_url)
+            delay = limiter.after_attempt(absolute_url, attempt, status, retry_after)
+            if delay is None:
+                return limiter.link_result(absolute_url, status, result)
+            time.sleep(delay)
+            attempt += 1
+
+    def _check_single_link(self, absolute_url):
+        """Returns (status_code, broken_message, verified); only verified results are cached."""
+        status, result, verified = self._probe_link(absolute_url)
+        if self.cache and verified:
+            self.cache.set(absolute_url, status, result)
+        return status, result, verified
+
+    @staticmethod
+    def link_status(target, status, cached=False, verified=True):
+        """One entry of a page's link_statuses list; status is None for timeouts, connection errors and open circuits."""
+        return {"target": target, "status": status, "cached": cached, "verified": verified}
+
+    def split_cached(self, target_urls, statuses=None):
+        """
+        Separates link targets with a fresh cache entry from those that need a request.
+        Returns (cached_broken, to_check) where cached_broken is a list of broken-link
+        messages marked as coming from the cache. If a statuses list is given, a
+        link_status entry is appended to it for every cached target.
+        """
+        cached_broken = []
+        to_check = []
+        for l_url in target_urls:
+            entry = self.cache.get(l_url) if self.cache else None
+            if entry is None:
+                to_check.append(l_url)
+                continue
+            if entry['result']:
+                cached_broken.append(f"{entry['result']} [cached]")
+            if statuses is not None:
+                statuses.append(self.link_status(l_url, entry.get('status'), cached=True))
+        return cached_broken, to_check
+
+    def extract_link_targets(self, page_url, soup=None, hrefs=None):
+        """
+        Collects the unique absolute link targets worth checking on a page.
+        Accepts either a parsed soup or a pre-extracted list of href values.
+        Anchors, mailto/tel links and social domains are skipped.
+        """
+        if hrefs is None:
+            hrefs = [link['href'] for link in soup.find_all('a', href=True)] if soup else []
+
+        # Avoid checking the same URL multiple times
+        target_urls = set()
+
+        for href in hrefs:
+            absolute_url = urljoin(page_url, href)
+
+            # Basic filter: skip anchors, mailto, tel
+            if absolute_url.startswith(('mailto:', 'tel:', '#')):
+                continue
+
+            # Filter out social links
+            if self.is_social_link(absolute_url):
+                continue
+
+            target_urls.add(absolute_url)
+
+        return target_urls
+
+    def check_page_links(self, url, soup=None, links=None, stats=None, statuses=None):
         """
         Finds all links on the page and checks their status code in parallel.
         Returns a list of broken links.
+
+        Pass the already-parsed `soup` (or a pre-extracted list of `links` hrefs)
+        to skip downloading and parsing the page a second time. If a `stats` dict
+        is given it is filled with the number of links checked and served from cache.
+        If a `statuses` list is given, one link_status entry per target is appended.
         """
         logger.info(f"🔍 Checking all links on {url}...")
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            if response.status_code != 200:
-                return [f"Page itself is unreachable: {response.status_code}"]
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = soup.find_all('a', href=True)
-            broken_links = []
-            
-            # Avoid checking the same URL multiple times
-            target_urls = set()
-            
-            for link in links:
-                href = link['href']
-                absolute_url = urljoin(url, href)
-                
-                # Basic filter: skip anchors, mailto, tel
-                if absolute_url.startswith(('mailto:', 'tel:', '#')):
-                    continue
-                
-                # Filter out social links
-                if self.is_social_link(absolute_url):
-                    continue
-
-                target_urls.add(absolute_url)
-
-            # Parallel checking
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_url = {executor.submit(self._check_single_link, l_url): l_url for l_url in target_urls}
-                for future in as_completed(future_to_url):
-                    result = future.result()
-                    if result:
-                        broken_links.append(result)
-            
-            return broken_links
+            if soup is None and links is None:
+                response = self.session.get(url, headers=self.headers, timeout=self.timeout)
+                if response.status_code != 200:
+                    return [f"Page itself is unreachable: {response.status_code}"]
+                soup = make_soup(response.text, self.parser_backend)
+
+            target_urls = self.extract_link_targets(url, soup=soup, hrefs=links)
+            return self.check_links(target_urls, stats=stats, statuses=statuses)
         except Exception as e:
             logger.error(f"Link checker fatal error: {e}")
             return [f"Link checker error: {str(e)}"]
+
+    def _submit_check(self, executor, absolute_url):
+        with self._inflight_lock:
+            future = self._inflight.get(absolute_url)
+            if future is None:
+                future = executor.submit(in_run_context(self._check_single_link), absolute_url)
+                self._inflight[absolute_url] = future
+                future.add_done_callback(lambda f: self._release_inflight(absolute_url))
+        return future
+
+    def _release_inflight(self, absolute_url):
+        with self._inflight_lock:
+            self._inflight.pop(absolute_url, None)
+
+    def check_links(self, target_urls, stats=None, statuses=None):
+        """
+        Checks a set of absolute URLs in parallel, skipping fresh cache entries.
+        Returns a list of broken links, and appends one link_status entry per
+        target to statuses if given.
+        """
+        broken_links, to_check = self.split_cached(target_urls, statuses)
+        if stats is not None:
+            stats.update({"total": len(target_urls), "cached": len(target_urls) - len(to_check), "unverified": 0})
+        if not to_check:
+            return broken_links
+
+        # Parallel checking
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_url = {self._submit_check(executor, l_url): l_url for l_url in to_check}
+            for future in as_completed(future_to_url):
+                status, result, verified = future.result()
+                if statuses is not None:
+                    statuses.append(self.link_status(future_to_url[future], status, verified=verified))
+                if result:
+                    broken_links.append(result)
+                elif not verified and stats is not None:
+                    stats['unverified'] += 1
+
+        return broken_links
@@ -0,0 +1,173 @@
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from .profiler import active_trace
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"'.replace('\n', ' ') for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts, sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _label_text(self.labels + ("le",), key + (repr(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_label_text(self.labels + ('le',), key + ('+Inf',))} {count}")
+                lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total}")
+                lines.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+        return lines
+
+class Gauge:
+    """Value read at scrape time from `callback`, which returns {label values tuple: value}."""
+
+    def __init__(self, name, help_text, callback, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} failed: {e}")
+            return lines
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_label_text(self.labels, key)} {value}")
+        return lines
+
+class Registry:
+    """
+    Minimal in-process metrics in the Prometheus text format, so the listener
+    can expose /metrics without extra dependencies.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, callback, labels=()):
+        return self._register(Gauge(name, help_text, callback, labels))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "autobugherd_stage_seconds", "Time spent in each QA stage (fetch, parse, checks, links, ticketing)", labels=("stage",)
+)
+HTTP_ERRORS = REGISTRY.counter(
+    "autobugherd_http_errors_total", "Failed HTTP requests by target (page, doc, link, bugherd) and status", labels=("target", "status")
+)
+
+class StageTimer:
+    """
+    Accumulates wall time per named stage for one page or run, and feeds each
+    measurement into the stage histogram. While a traced RunProfiler is active,
+    each stage is also recorded as a span tagged with `label` (the page URL),
+    on the `lane` row if given, else on the current thread's row.
+
+        timer = StageTimer(label=url)
+        with timer.stage('fetch'):
+            ...
+        timer.as_dict()  # {'fetch': 12.3} in milliseconds
+    """
+
+    def __init__(self, label=None, lane=None):
+        self.label = label
+        self.lane = lane
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, start)
+
+    def add(self, name, seconds, start=None):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        STAGE_SECONDS.observe(seconds, stage=name)
+        trace = active_trace()
+        if trace:
+            if start is None:
+                start = time.perf_counter() - seconds
+            args = {"url": self.label} if self.label else {}
+            trace.span(name, start, seconds, lane=self.lane, **args)
+
+    def extend(self, timings):
+        """Adds stage timings (seconds) measured and observed elsewhere, e.g. by the async fetcher."""
+        for name, seconds in (timings or {}).items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        """Stage timings in milliseconds, in the order the stages first ran."""
+        return {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()}
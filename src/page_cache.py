@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class PageCache:
+    """
+    On-disk cache of response bodies keyed by URL, used for conditional GETs.
+
+    Bodies are only stored when the server sends an ETag or Last-Modified
+    validator. Later requests send If-None-Match / If-Modified-Since and a 304
+    reuses the stored body.
+
+    An optional in-memory LRU of up to max_parsed parse results (soup or
+    extracted text) per URL lets a long-lived process such as the webhook
+    listener skip re-parsing an unchanged page too. It is off by default: a CLI
+    run parses each URL once, so the LRU would only pin full trees in memory.
+    """
+
+    def __init__(self, directory, max_parsed=0):
+        self.directory = directory
+        self.max_parsed = max_parsed
+        self._parsed = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.html"
+
+    def _load_meta(self, url):
+        meta_path, body_path = self._paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write(path, content):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def request_headers(self, url, headers=None):
+        """Returns headers for a GET of url, with validators added when a body is cached."""
+        request_headers = dict(headers or {})
+        meta = self._load_meta(url)
+        if meta:
+            if meta.get('etag'):
+                request_headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request_headers['If-Modified-Since'] = meta['last_modified']
+        return request_headers
+
+    def resolve(self, url, status, response_headers, body):
+        """
+        Applies a response to the cache.
+
+        Returns (status, body, not_modified). A 304 is turned into a 200 carrying
+        the cached body with not_modified=True.
+        """
+        meta_path, body_path = self._paths(url)
+
+        if status == 304:
+            try:
+                with open(body_path, 'r', encoding='utf-8') as f:
+                    return 200, f.read(), True
+            except OSError:
+                logger.warning(f"Got 304 for {url} but the cached body is missing")
+                return status, body, False
+
+        if status == 200 and body is not None:
+            etag = response_headers.get('ETag')
+            last_modified = response_headers.get('Last-Modified')
+            if etag or last_modified:
+                try:
+                    self._write(body_path, body)
+                    self._write(meta_path, json.dumps({"url": url, "etag": etag, "last_modified": last_modified}))
+                except OSError as e:
+                    logger.warning(f"Failed to cache body for {url}: {e}")
+
+        return status, body, False
+
+    def fetch(self, session, url, headers=None, timeout=10, accept=None):
+        """
+        Conditional GET through a requests session. Returns (status, body, not_modified).
+
+        accept, if given, is called with the response headers of a 200. When it
+        returns False the body is neither downloaded nor cached, and the result
+        is (200, None, False).
+        """
+        with session.get(url, headers=self.request_headers(url, headers), timeout=timeout, stream=accept is not None) as response:
+            if response.status_code == 200 and accept is not None and not accept(response.headers):
+                return response.status_code, None, False
+            body = response.text if response.status_code == 200 else None
+            return self.resolve(url, response.status_code, response.headers, body)
+
+    def keep_parsed(self, max_parsed):
+        """Sets how many parse results to remember (0 turns the LRU off and empties it)."""
+        with self._lock:
+            self.max_parsed = max(0, int(max_parsed))
+            while len(self._parsed) > self.max_parsed:
+                self._parsed.popitem(last=False)
+
+    def parsed(self, url):
+        """Returns the parse result remembered for url's current cached body, if any."""
+        if not self.max_parsed:
+            return None
+        meta = self._load_meta(url)
+        validator = (meta.get('etag'), meta.get('last_modified')) if meta else None
+        with self._lock:
+            cached = self._parsed.get(url)
+            if cached and validator and cached[0] == validator:
+                self._parsed.move_to_end(url)
+                return cached[1]
+        return None
+
+    def remember_parsed(self, url, parsed):
+        if not self.max_parsed:
+            return
+        meta = self._load_meta(url)
+        if not meta:
+            return
+        with self._lock:
+            self._parsed[url] = ((meta.get('etag'), meta.get('last_modified')), parsed)
+            self._parsed.move_to_end(url)
+            while len(self._parsed) > self.max_parsed:
+                self._parsed.popitem(last=False)
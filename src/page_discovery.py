@@ -0,0 +1,280 @@
+import gzip
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, deque
+from urllib.parse import urljoin, urldefrag, urlparse
+
+from .host_limiter import TokenBucket
+from .html_parser import HeadLinkScanner
+
+logger = logging.getLogger(__name__)
+
+# Links to these are never pages, so the crawler doesn't request them
+NON_PAGE_EXTENSIONS = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.css', '.js',
+    '.zip', '.mp4', '.mp3', '.xml', '.json', '.txt', '.doc', '.docx', '.xls', '.xlsx'
+)
+
+# Sitemap indexes may point at further indexes; stop following them past this depth
+MAX_SITEMAP_NESTING = 3
+
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+SITEMAP_ENTRIES = (f'{SITEMAP_NS}url', f'{SITEMAP_NS}sitemap')
+
+# Crawled bodies waiting to be picked up by the page check (see take_body)
+MAX_HANDOFF_BODIES = 64
+
+def is_html(headers):
+    """True if a response's Content-Type is HTML (or missing)."""
+    return 'html' in headers.get('Content-Type', 'text/html')
+
+class PageDiscovery:
+    """
+    Finds a project's pages from its sitemap (following sitemap indexes) or,
+    failing that, a breadth-first crawl of same-domain links.
+
+    pages() is a generator: sitemaps are parsed incrementally and each URL is
+    yielded as soon as it is found, so a run can start checking pages while
+    discovery continues. Every request goes through `rate_limiter`, which the
+    engine also applies to the page checks themselves.
+
+    The crawl keeps at most `max_frontier` URLs queued or seen (default ten
+    times max_pages), so memory is bounded by that rather than by the size of
+    the site. Bodies it has already downloaded are handed to the page check
+    through take_body() instead of being fetched twice.
+
+    Project config:
+        "discover": {
+            "sitemap": "https://example.com/sitemap.xml",
+            "crawl_from": "https://example.com/",
+            "max_pages": 500,
+            "max_depth": 3,
+            "max_frontier": 5000,
+            "requests_per_second": 2
+        }
+    """
+
+    def __init__(self, session, headers=None, timeout=10, sitemap=None, crawl_from=None,
+                 max_pages=500, max_depth=3, requests_per_second=2.0, page_cache=None, max_frontier=None):
+        self.session = session
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.sitemap = sitemap
+        self.crawl_from = crawl_from
+        self.max_pages = max(0, int(max_pages))
+        self.max_depth = max(0, int(max_depth))
+        self.max_frontier = max(1, int(max_frontier if max_frontier is not None else self.max_pages * 10))
+        self.page_cache = page_cache
+        self._bodies = OrderedDict()
+        self._bodies_lock = threading.Lock()
+        self._seed = None
+        self._seeded = threading.Event()
+        self._await_seed = False
+        rate = float(requests_per_second)
+        self.rate_limiter = TokenBucket(rate, max(1.0, rate))
+        self.host = self._site_of(sitemap or crawl_from or "")
+
+    @classmethod
+    def for_project(cls, project, session, headers=None, timeout=10, page_cache=None):
+        """A PageDiscovery for the project's `discover` options, or None if it has none."""
+        options = project.get('discover')
+        if not options:
+            return None
+        if not (options.get('sitemap') or options.get('crawl_from')):
+            logger.warning(f"Project {project.get('name')}: 'discover' needs a sitemap or crawl_from URL.")
+            return None
+        return cls(
+            session, headers=headers, timeout=timeout,
+            sitemap=options.get('sitemap'),
+            crawl_from=options.get('crawl_from'),
+            max_pages=options.get('max_pages', 500),
+            max_depth=options.get('max_depth', 3),
+            max_frontier=options.get('max_frontier'),
+            requests_per_second=options.get('requests_per_second', 2.0),
+            page_cache=page_cache
+        )
+
+    def pages(self, skip=()):
+        """
+        Yields up to max_pages same-domain page URLs, skipping any in `skip`.
+        The caller is expected to take_body() each URL as it is yielded; bodies
+        still stashed when discovery stops are dropped.
+        """
+        seen = set(skip)
+        found = 0
+        if not self.max_pages:
+            return
+        # crawl_from is also a live page: the crawl starts from the body its page check fetches
+        self._await_seed = self.crawl_from in seen
+
+        sources = []
+        if self.sitemap:
+            sources.append(self._sitemap_urls(self.sitemap))
+        if self.crawl_from:
+            sources.append(self._crawl(self.crawl_from))
+
+        try:
+            for source in sources:
+                for url in source:
+                    if url in seen or not self._same_site(url):
+                        # e.g. crawl_from listed in live_pages: already checked on its own
+                        self.take_body(url)
+                        continue
+                    seen.add(url)
+                    found += 1
+                    yield url
+                    # Stop before pulling the next URL, which for the crawl means another fetch
+                    if found >= self.max_pages:
+                        logger.info(f"Discovery stopped at max_pages={self.max_pages}")
+                        return
+                if found:
+                    # A sitemap that listed pages makes the crawl unnecessary
+                    break
+            logger.info(f"Discovered {found} page(s) on {self.host}")
+        finally:
+            for source in sources:
+                source.close()
+            with self._bodies_lock:
+                self._bodies.clear()
+                self._seed = None
+
+    def seed(self, url, body):
+        """
+        Hands the crawl the body of crawl_from when it is also a live page, so it
+        isn't downloaded twice. The page check calls this once it has the body,
+        or with None once it is done without one (unreachable, --head-only); only
+        the first call counts. Calls for other URLs are ignored.
+        """
+        if url != self.crawl_from or self._seeded.is_set():
+            return
+        with self._bodies_lock:
+            self._seed = body
+        self._seeded.set()
+
+    def take_body(self, url):
+        """Returns (and forgets) the body the crawl downloaded for url, or None."""
+        with self._bodies_lock:
+            return self._bodies.pop(url, None)
+
+    def _take_seed(self, url):
+        """The live page check's body of crawl_from, waiting up to timeout seconds for it."""
+        if url != self.crawl_from or not self._await_seed:
+            return None
+        if not self._seeded.wait(self.timeout):
+            logger.info(f"Crawl fetching {url} itself: its page check hasn't finished")
+        with self._bodies_lock:
+            seed, self._seed = self._seed, None
+            return seed
+
+    def _hand_off(self, url, body):
+        with self._bodies_lock:
+            self._bodies[url] = body
+            while len(self._bodies) > MAX_HANDOFF_BODIES:
+                # Not picked up before the crawl ran this far ahead: the page check fetches it again
+                self._bodies.popitem(last=False)
+
+    @staticmethod
+    def _site_of(url):
+        """Host of url, ignoring case and a leading www."""
+        host = urlparse(url).netloc.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _same_site(self, url):
+        return urlparse(url).scheme in ('http', 'https') and self._site_of(url) == self.host
+
+    def _sitemap_urls(self, sitemap_url, nesting=0):
+        """Streams <loc> entries out of a sitemap, recursing into sitemap indexes."""
+        self.rate_limiter.acquire()
+        children = []
+        try:
+            with self.session.get(sitemap_url, headers=self.headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code != 200:
+                    logger.warning(f"Sitemap {sitemap_url} returned HTTP {response.status_code}")
+                    return
+                response.raw.decode_content = True
+                source = response.raw
+                if sitemap_url.endswith('.gz') and 'gzip' not in response.headers.get('Content-Encoding', ''):
+                    source = gzip.GzipFile(fileobj=response.raw)
+
+                # Only a <loc> directly inside <url>/<sitemap> counts: extensions
+                # nest their own, e.g. <image:image><image:loc> in Yoast sitemaps
+                path = []
+                for event, element in ET.iterparse(source, events=('start', 'end')):
+                    if event == 'start':
+                        path.append(element)
+                        continue
+                    path.pop()
+                    if element.tag == f'{SITEMAP_NS}loc' and len(path) == 2 and path[1].tag in SITEMAP_ENTRIES:
+                        loc = (element.text or '').strip()
+                        if not loc:
+                            continue
+                        if path[1].tag == f'{SITEMAP_NS}sitemap':
+                            children.append(loc)
+                        else:
+                            yield loc
+                    elif element.tag in SITEMAP_ENTRIES and len(path) == 1:
+                        # Detach finished entries from the root so memory stays flat on huge sitemaps
+                        path[0].remove(element)
+        except (ET.ParseError, OSError) as e:
+            logger.warning(f"Could not parse sitemap {sitemap_url}: {e}")
+        except Exception as e:
+            logger.warning(f"Error fetching sitemap {sitemap_url}: {e}")
+
+        for child in children:
+            if nesting >= MAX_SITEMAP_NESTING:
+                logger.warning(f"Not following nested sitemap {child}: too deep")
+                continue
+            yield from self._sitemap_urls(child, nesting + 1)
+
+    def _crawl(self, start_url):
+        """
+        Breadth-first crawl from start_url, following same-domain links up to
+        max_depth. Once max_frontier URLs have been queued, no new ones are added.
+        """
+        queue = deque([(start_url, 0)])
+        queued = {start_url}
+        while queue:
+            url, depth = queue.popleft()
+            html = self._take_seed(url)
+            if html is None:
+                html = self._fetch_html(url)
+            if html is None:
+                continue
+            self._hand_off(url, html)
+            yield url
+            if depth >= self.max_depth or len(queued) >= self.max_frontier:
+                continue
+
+            scanner = HeadLinkScanner()
+            scanner.feed(html)
+            scanner.close()
+            for href in scanner.hrefs:
+                link = urldefrag(urljoin(url, href))[0]
+                if link in queued or not self._same_site(link):
+                    continue
+                if urlparse(link).path.lower().endswith(NON_PAGE_EXTENSIONS):
+                    continue
+                queued.add(link)
+                queue.append((link, depth + 1))
+                if len(queued) >= self.max_frontier:
+                    logger.info(f"Crawl frontier reached max_frontier={self.max_frontier}; not queueing more links")
+                    break
+
+    def _fetch_html(self, url):
+        self.rate_limiter.acquire()
+        try:
+            if self.page_cache:
+                # Non-HTML responses (PDFs, images) are skipped before they're read or cached
+                status, body, _ = self.page_cache.fetch(
+                    self.session, url, headers=self.headers, timeout=self.timeout, accept=is_html
+                )
+            else:
+                with self.session.get(url, headers=self.headers, timeout=self.timeout, stream=True) as response:
+                    if response.status_code == 200 and not is_html(response.headers):
+                        return None
+                    status, body = response.status_code, response.text
+        except Exception as e:
+            logger.warning(f"Crawl could not fetch {url}: {e}")
+            return None
+        return body if status == 200 else None
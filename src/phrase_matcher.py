@@ -0,0 +1,102 @@
+import re
+from collections import deque
+
+_WHITESPACE = re.compile(r'\s+')
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of phrases.
+
+    Built once per project, then `find_all` reports every occurrence of every
+    phrase in a single pass over the page text, however many phrases there are.
+
+    Args:
+        phrases: Phrases to look for.
+        ignore_case: Match regardless of case.
+        normalize_whitespace: Treat any run of whitespace (in phrases and text) as one space.
+    """
+
+    def __init__(self, phrases, ignore_case=False, normalize_whitespace=False):
+        self.ignore_case = ignore_case
+        self.normalize_whitespace = normalize_whitespace
+        self.phrases = list(dict.fromkeys(p for p in phrases if p and p.strip()))
+
+        # Node 0 is the root. goto[n] maps a character to the next node,
+        # out[n] lists (phrase, length) pairs that end at node n.
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for phrase in self.phrases:
+            self._add(phrase)
+        self._build_failure_links()
+
+    def _prepare(self, text):
+        if self.normalize_whitespace:
+            text = _WHITESPACE.sub(' ', text)
+        if self.ignore_case:
+            text = text.lower()
+        return text
+
+    def _add(self, phrase):
+        key = self._prepare(phrase)
+        if self.normalize_whitespace:
+            key = key.strip()
+        node = 0
+        for char in key:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+        self._out[node].append((phrase, len(key)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end at the failure target
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def search_text(self, text):
+        """The text actually scanned by find_all (after case/whitespace normalisation)."""
+        return self._prepare(text or "")
+
+    def find_all(self, text):
+        """
+        Returns a dict mapping each phrase found to a list of (start, length)
+        pairs, one per occurrence in search_text(text). The length is that of the
+        matched text, which differs from len(phrase) once whitespace or case is
+        normalised. Phrases not found are absent.
+        """
+        return self.scan(self.search_text(text))
+
+    def scan(self, text):
+        """Like find_all, for text that has already been through search_text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = {}
+        node = 0
+        for pos, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                for phrase, length in out[node]:
+                    matches.setdefault(phrase, []).append((pos - length + 1, length))
+        return matches
+
+    @staticmethod
+    def snippet(text, offset, length, context=30):
+        """Short excerpt around a match, for issue messages."""
+        start = max(0, offset - context)
+        end = min(len(text), offset + length + context)
+        excerpt = _WHITESPACE.sub(' ', text[start:end]).strip()
+        return f"{'...' if start else ''}{excerpt}{'...' if end < len(text) else ''}"
@@ -0,0 +1,194 @@
+import cProfile
+import contextvars
+import datetime
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Only one run can be profiled at a time: on 3.12+ cProfile is process-wide
+_profile_lock = threading.Lock()
+
+# Before 3.12 cProfile only sees the thread that enabled it, so worker threads get their own
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+# The RunProfiler of the run this code is working for. Context-local, so concurrent
+# webhook jobs only trace their own stages; executor calls carry it via in_run_context().
+_current = contextvars.ContextVar("autobugherd_run_profiler", default=None)
+
+def active_trace():
+    """The ChromeTrace of the run being profiled with tracing on, or None."""
+    profiler = _current.get()
+    return profiler.trace if profiler else None
+
+def in_run_context(fn):
+    """
+    Wraps fn for submission to an executor so the worker thread counts as part
+    of the calling run: its stage spans go to the caller's trace and, before
+    Python 3.12, its calls are added to the caller's profile.
+    """
+    profiler = _current.get()
+    if profiler is None:
+        return fn
+
+    def call(*args, **kwargs):
+        token = _current.set(profiler)
+        try:
+            with profiler.thread_profile():
+                return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return call
+
+class ChromeTrace:
+    """
+    Collects timed spans and writes them in the Chrome trace event format, which
+    chrome://tracing and https://ui.perfetto.dev open as a timeline. Spans land
+    on one row per lane: the worker thread by default, or e.g. the page URL for
+    pages fetched concurrently on the async event loop.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._events = []
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def span(self, name, start, duration, lane=None, **args):
+        """Records a span that began at perf_counter() value `start` and lasted `duration` seconds."""
+        lane = lane or threading.current_thread().name
+        with self._lock:
+            tid = self._lanes.setdefault(lane, len(self._lanes) + 1)
+            self._events.append({
+                "name": name,
+                "ph": "X",
+                "pid": os.getpid(),
+                "tid": tid,
+                "ts": round((start - self._origin) * 1e6, 1),
+                "dur": round(duration * 1e6, 1),
+                "args": args
+            })
+
+    def write(self, path):
+        with self._lock:
+            lanes = [
+                {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": lane}}
+                for lane, tid in self._lanes.items()
+            ]
+            events = lanes + self._events
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+class RunProfiler:
+    """
+    Context manager that profiles one run with cProfile and, with trace=True,
+    records every StageTimer stage into a ChromeTrace.
+
+    On Python 3.12+ one profiler sees every thread in the process, so anything
+    else running concurrently (e.g. another webhook job) shows up in the
+    profile too; the trace only ever holds this run's stages. Before 3.12 each
+    worker thread doing work for the run (see in_run_context) gets its own
+    profiler, and they are merged into one .prof file, readable with pstats or
+    snakeviz.
+
+        with RunProfiler("reports/profiles", "project_42", trace=True):
+            engine.run_qa_project("42")
+    """
+
+    def __init__(self, output_dir, name, trace=False, top=25):
+        self.output_dir = output_dir
+        self.name = name
+        self.trace = ChromeTrace() if trace else None
+        self.top = top
+        self.profile_path = None
+        self.trace_path = None
+        self._profiles = {}
+        self._profiles_lock = threading.Lock()
+        self._local = threading.local()
+        self._main = None
+        self._owner = None
+        self._owns_lock = False
+        self._token = None
+
+    def __enter__(self):
+        self._owns_lock = _profile_lock.acquire(blocking=False)
+        if not self._owns_lock:
+            logger.warning(f"Another run is already being profiled; not profiling {self.name}")
+            return self
+        self._main = cProfile.Profile()
+        try:
+            self._main.enable()
+        except ValueError as e:
+            # Another profiler or debugger owns the hook (3.12+ allows only one)
+            logger.warning(f"Could not start profiler for {self.name}: {e}")
+            self._main = None
+            _profile_lock.release()
+            self._owns_lock = False
+            return self
+        self._owner = threading.get_ident()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        if not self._owns_lock:
+            return False
+        try:
+            self._main.disable()
+            _current.reset(self._token)
+            self._write()
+        except Exception as e:
+            logger.error(f"Could not write profile for {self.name}: {e}")
+        finally:
+            _profile_lock.release()
+        return False
+
+    @contextmanager
+    def thread_profile(self):
+        """Profiles the current worker thread for the duration of the block (before 3.12 only)."""
+        if (not PER_THREAD_PROFILES or self._main is None or threading.get_ident() == self._owner
+                or getattr(self._local, "active", False)):
+            yield
+            return
+        with self._profiles_lock:
+            profile = self._profiles.setdefault(threading.get_ident(), cProfile.Profile())
+        self._local.active = True
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._local.active = False
+
+    def _write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stem = f"{self.name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if os.path.exists(os.path.join(self.output_dir, f"profile_{stem}.prof")):
+            # Several runs in the same second (e.g. back-to-back webhook jobs)
+            stem = f"{stem}_{os.getpid()}_{time.monotonic_ns()}"
+        stats = pstats.Stats(self._main)
+        with self._profiles_lock:
+            for profile in self._profiles.values():
+                try:
+                    stats.add(profile)
+                except TypeError:
+                    # A thread that never ran any profiled code has no stats
+                    pass
+        self.profile_path = os.path.join(self.output_dir, f"profile_{stem}.prof")
+        stats.dump_stats(self.profile_path)
+        logger.info(f"Profile written: {self.profile_path} ({len(self._profiles) + 1} thread(s))")
+
+        summary = io.StringIO()
+        pstats.Stats(self.profile_path, stream=summary).sort_stats("cumulative").print_stats(self.top)
+        logger.info(f"Top {self.top} functions by cumulative time:\n{summary.getvalue()}")
+
+        if self.trace:
+            self.trace_path = os.path.join(self.output_dir, f"trace_{stem}.json")
+            self.trace.write(self.trace_path)
+            logger.info(f"Trace written: {self.trace_path} (open in chrome://tracing or ui.perfetto.dev)")
@@ -0,0 +1,131 @@
+import os
+import time
+import logging
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+
+from .engine import BugHerdEngine
+from .metrics import StageTimer
+
+logger = logging.getLogger(__name__)
+
+# Engine owned by each worker process, created once by _init_worker
+_worker_engine = None
+
+def _init_worker(config_path, base_path, shared_links=None, run_started=None):
+    global _worker_engine
+    _worker_engine = BugHerdEngine(config_path=config_path, base_path=base_path)
+    if shared_links is not None:
+        # Links checked by any worker in this run are reused by the others
+        _worker_engine.link_cache.share(shared_links, run_started)
+
+def _run_shard(project_id, page_names, options, profile=None, doc_text=None):
+    """
+    Checks one project (or a slice of its pages) and returns its results plus any
+    queued tickets. profile is None or {"name", "trace"} for RunProfiler.
+    doc_text is the project's Google Doc text when the parent already fetched it.
+    """
+    project = _worker_engine.get_project(project_id)
+    with _worker_engine.profiler(profile['name'], trace=profile['trace']) if profile else nullcontext():
+        results = _worker_engine.collect_project_results(project, page_names=page_names, doc_text=doc_text, **options)
+    # Tickets go back to the parent so one outbox files them all under one rate limit
+    return results, _worker_engine.ticket_outbox.take()
+
+def plan_shards(projects, pages_per_process=0):
+    """
+    Splits projects into (project_id, page_names) work items. page_names is None
+    for a whole project, or a slice of its pages when it has more than
+    pages_per_process of them.
+    """
+    shards = []
+    for project in projects:
+        names = list(project.get('live_pages', {}))
+        # Projects with page discovery run whole: their page list isn't known up front
+        if pages_per_process and len(names) > pages_per_process and not project.get('discover'):
+            for start in range(0, len(names), pages_per_process):
+                shards.append((project['id'], names[start:start + pages_per_process]))
+        else:
+            shards.append((project['id'], None))
+    return shards
+
+def run_all_projects(engine, config_path=None, processes=None, pages_per_process=0, profile=False, trace=False, **options):
+    """
+    Runs every configured project across a pool of processes, so parsing and
+    fuzzy matching use every core. Writes one report per project and a combined
+    summary once all of them finish. Returns True if every page passed.
+
+    With profile (and trace), each shard writes its own profile in its worker process.
+    The Google Doc of a project split across shards is fetched once, here, and
+    with check_links every worker shares one in-run link status cache.
+
+    options are passed to BugHerdEngine.collect_project_results (auto_ticket,
+    check_links, use_async, incremental, head_only).
+    """
+    projects = engine.config['projects']
+    if not projects:
+        logger.error("No projects configured.")
+        return False
+
+    config_path = config_path or engine.config_path
+    shards = plan_shards(projects, pages_per_process)
+    processes = processes or engine.config['settings'].get('max_project_processes') or os.cpu_count() or 1
+    processes = max(1, min(int(processes), len(shards)))
+    logger.info(f"Running {len(projects)} project(s) as {len(shards)} job(s) on {processes} process(es)")
+
+    run_timer = StageTimer()
+    run_started = time.time()
+    # A project split into slices would otherwise have its doc fetched and parsed by every slice
+    doc_texts = {}
+    with run_timer.stage('doc'):
+        for project in projects:
+            sliced = sum(1 for project_id, _ in shards if project_id == project['id']) > 1
+            if sliced and project.get('google_doc_url'):
+                doc_texts[project['id']] = engine.fetch_doc_text(project['google_doc_url'])
+
+    results_by_project = {project['id']: [] for project in projects}
+    with Manager() if options.get('check_links') else nullcontext() as manager:
+        shared_links = manager.dict() if manager else None
+        with ProcessPoolExecutor(
+            max_workers=processes, initializer=_init_worker,
+            initargs=(config_path, engine.base_path, shared_links, run_started)
+        ) as pool:
+            futures = [
+                pool.submit(_run_shard, project_id, page_names, options,
+                            {"name": f"project_{project_id}_shard{i}", "trace": trace} if profile or trace else None,
+                            doc_texts.get(project_id))
+                for i, (project_id, page_names) in enumerate(shards)
+            ]
+            for future, (project_id, page_names) in zip(futures, shards):
+                try:
+                    results, tickets = future.result()
+                except Exception as e:
+                    logger.error(f"QA run failed for project {project_id}: {e}")
+                    results, tickets = [{"page_name": "QA run", "url": "", "issues": [f"QA check error: {e}"]}], []
+                results_by_project[project_id].extend(results)
+                for ticket in tickets:
+                    engine.ticket_outbox.add(
+                        ticket['project_id'], ticket['issue_type'], ticket['description'],
+                        page_url=ticket['page_url'], selector=ticket['selector']
+                    )
+
+    if options.get('auto_ticket'):
+        with run_timer.stage('ticketing'):
+            engine.ticket_outbox.flush()
+
+    summaries = []
+    for project in projects:
+        results = results_by_project[project['id']]
+        engine.record_results(project['id'], project['name'], results, run_timer.as_dict(), options)
+        report = engine.report_gen.generate_html_report(project['name'], results, run_timings=run_timer.as_dict()) if results else None
+        summaries.append({
+            "project": project['name'],
+            "pages": len(results),
+            "failed_pages": sum(1 for r in results if r['issues']),
+            "issues": sum(len(r['issues']) for r in results),
+            "report": report
+        })
+        logger.info(f"{project['name']}: {summaries[-1]['failed_pages']}/{len(results)} pages with issues")
+
+    engine.report_gen.generate_summary_report(summaries)
+    return all(summary['failed_pages'] == 0 for summary in summaries)
@@ -1,77 +1,143 @@
 import datetime
+import json
 import os
+import shutil
 import logging
 from typing import Optional
+from xml.sax.saxutils import escape, quoteattr
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Formats ReportWriter can produce, by file extension
+REPORT_FORMATS = {"html": "html", "jsonl": "jsonl", "junit": "xml"}
+
+HTML_STYLE = """
+                body { font-family: 'Inter', sans-serif; background: #f4f7f6; color: #333; margin: 0; padding: 40px; }
+                .container { max-width: 1000px; margin: auto; background: white; padding: 30px; border-radius: 12px; box-shadow: 0 4px 20px rgba(0,0,0,0.08); }
+                h1 { color: #1a1a1a; margin-top: 0; }
+                .meta { color: #666; font-size: 0.9em; margin-bottom: 30px; border-bottom: 1px solid #eee; padding-bottom: 20px; }
+                .footer { color: #666; font-size: 0.9em; margin-top: 30px; border-top: 1px solid #eee; padding-top: 20px; }
+                .card { border: 1px solid #eee; border-radius: 8px; padding: 20px; margin-bottom: 20px; }
+                .card.pass { border-left: 6px solid #2ecc71; }
+                .card.fail { border-left: 6px solid #e74c3c; }
+                .status-badge { display: inline-block; padding: 4px 12px; border-radius: 20px; font-size: 0.8em; font-weight: bold; text-transform: uppercase; }
+                .pass .status-badge { background: #eafaf1; color: #2ecc71; }
+                .fail .status-badge { background: #fdf2f2; color: #e74c3c; }
+                .issue-list { margin-top: 15px; padding-left: 20px; color: #555; }
+                .issue-item { margin-bottom: 8px; }
+                .link-stats, .card-note, .timings { margin-top: 10px; color: #888; font-size: 0.85em; }
+                a { color: #3498db; text-decoration: none; }
+                a:hover { text-decoration: underline; }
+"""
+
 class ReportGenerator:
-    def __init__(self, output_dir="reports"):
+    def __init__(self, output_dir="reports", formats=("html",)):
         self.output_dir = output_dir
+        unknown = [f for f in formats if f not in REPORT_FORMATS]
+        if unknown:
+            logger.warning(f"Ignoring unknown report format(s): {', '.join(unknown)}. Available: {', '.join(REPORT_FORMATS)}")
+        self.formats = tuple(f for f in formats if f in REPORT_FORMATS) or ("html",)
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-    def generate_html_report(self, project_name: str, results: list[dict]) -> Optional[str]:
+    def generate_html_report(self, project_name: str, results: list[dict], run_timings: Optional[dict] = None) -> Optional[str]:
         """
-        Generate an HTML report for the QA results.
+        Generate an HTML report for the QA results, plus any other configured formats.
         
         Args:
             project_name: Name of the project for the report.
             results: List of dictionaries containing page_name, url, and issues.
+            run_timings: Optional run-wide stage timings in ms (doc fetch, page checks, ticketing).
         
         Returns:
-            Path to the generated HTML report file, or None if an error occurs.
+            Path to the generated HTML report file (or the first other format
+            when html is not configured), or None if an error occurs.
         """
         if not project_name or not results:
             logger.error("Invalid input: project_name and results must be provided.")
             return None
-        
+
+        writer = self.open_report(project_name)
+        for result in results:
+            writer.add(result)
+        paths = writer.close(run_timings)
+        return paths.get('html') or next(iter(paths.values()), None)
+
+    def open_report(self, project_name: str) -> "ReportWriter":
+        """
+        Start a streaming report: add() writes each page as it finishes and
+        close() finishes the files. Nothing is written until the first page.
+        """
+        return ReportWriter(self, project_name, self.formats)
+
+    def generate_summary_report(self, summaries: list[dict]) -> Optional[str]:
+        """
+        Generate a combined report linking to each project's report.
+
+        Args:
+            summaries: List of dictionaries containing project, pages, failed_pages, issues and report (path or None).
+
+        Returns:
+            Path to the generated HTML report file, or None if an error occurs.
+        """
+        if not summaries:
+            logger.error("Invalid input: summaries must be provided.")
+            return None
+
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        filename = f"report_{project_name.lower().replace(' ', '_')}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-        filepath = os.path.join(self.output_dir, filename)
+        filepath = os.path.join(self.output_dir, f"summary_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
+
+        rows = []
+        for summary in summaries:
+            status_class = "pass" if not summary['failed_pages'] else "fail"
+            name = summary['project']
+            if summary.get('report'):
+                name = f'<a href="{os.path.basename(summary["report"])}">{name}</a>'
+            rows.append(
+                f'<tr class="{status_class}"><td>{name}</td><td>{summary["pages"]}</td>'
+                f'<td>{summary["failed_pages"]}</td><td>{summary["issues"]}</td></tr>'
+            )
 
         html_content = f"""
         <!DOCTYPE html>
         <html>
         <head>
-            <title>QA Report - {project_name}</title>
+            <title>QA Summary</title>
             <style>
                 body {{ font-family: 'Inter', sans-serif; background: #f4f7f6; color: #333; margin: 0; padding: 40px; }}
                 .container {{ max-width: 1000px; margin: auto; background: white; padding: 30px; border-radius: 12px; box-shadow: 0 4px 20px rgba(0,0,0,0.08); }}
                 h1 {{ color: #1a1a1a; margin-top: 0; }}
                 .meta {{ color: #666; font-size: 0.9em; margin-bottom: 30px; border-bottom: 1px solid #eee; padding-bottom: 20px; }}
-                .card {{ border: 1px solid #eee; border-radius: 8px; padding: 20px; margin-bottom: 20px; }}
-                .card.pass {{ border-left: 6px solid #2ecc71; }}
-                .card.fail {{ border-left: 6px solid #e74c3c; }}
-                .status-badge {{ display: inline-block; padding: 4px 12px; border-radius: 20px; font-size: 0.8em; font-weight: bold; text-transform: uppercase; }}
-                .pass .status-badge {{ background: #eafaf1; color: #2ecc71; }}
-                .fail .status-badge {{ background: #fdf2f2; color: #e74c3c; }}
-                .issue-list {{ margin-top: 15px; padding-left: 20px; color: #555; }}
-                .issue-item {{ margin-bottom: 8px; }}
+                table {{ width: 100%; border-collapse: collapse; }}
+                th, td {{ text-align: left; padding: 10px; border-bottom: 1px solid #eee; }}
+                tr.pass td:first-child {{ border-left: 6px solid #2ecc71; }}
+                tr.fail td:first-child {{ border-left: 6px solid #e74c3c; }}
                 a {{ color: #3498db; text-decoration: none; }}
                 a:hover {{ text-decoration: underline; }}
             </style>
         </head>
         <body>
             <div class="container">
-                <h1>QA Automation Report</h1>
+                <h1>QA Summary</h1>
                 <div class="meta">
-                    <strong>Project:</strong> {project_name}<br>
+                    <strong>Projects:</strong> {len(summaries)}<br>
                     <strong>Generated:</strong> {timestamp}
                 </div>
-                
-                {"".join([self._render_card(r) for r in results])}
+                <table>
+                    <tr><th>Project</th><th>Pages</th><th>Pages with issues</th><th>Issues</th></tr>
+                    {"".join(rows)}
+                </table>
             </div>
         </body>
         </html>
         """
-        
+
         try:
             with open(filepath, 'w') as f:
                 f.write(html_content)
-            logger.info(f"✅ HTML Report generated: {filepath}")
+            logger.info(f"✅ Summary Report generated: {filepath}")
             return filepath
         except IOError as e:
             logger.error(f"Failed to write report file: {e}")
@@ -97,6 +163,20 @@ class ReportGenerator:
         issues_html = ""
         if result['issues']:
             issues_html = '<ul class="issue-list">' + "".join([f'<li class="issue-item">{i}</li>' for i in result['issues']]) + '</ul>'
+
+        if result.get('reused'):
+            issues_html += '<div class="card-note">Unchanged since last run: content check results reused</div>'
+
+        link_stats = result.get('link_stats')
+        if link_stats and link_stats.get('total'):
+            stats_text = f'{link_stats["total"]} links checked, {link_stats.get("cached", 0)} from cache'
+            if link_stats.get('unverified'):
+                stats_text += f', {link_stats["unverified"]} unverified (host throttled)'
+            issues_html += f'<div class="link-stats">{stats_text}</div>'
+
+        timings_text = self._render_timings(result.get('timings'))
+        if timings_text:
+            issues_html += f'<div class="timings">{timings_text}</div>'
         
         return f"""
         <div class="card {status_class}">
@@ -110,3 +190,156 @@ class ReportGenerator:
             {issues_html}
         </div>
         """
+
+    @staticmethod
+    def _render_timings(timings: Optional[dict], prefix: str = "") -> str:
+        """Formats stage timings in ms as "fetch 120.5ms · parse 30.1ms", or "" when there are none."""
+        if not timings:
+            return ""
+        return prefix + " · ".join(f"{stage} {ms:.1f}ms" for stage, ms in timings.items())
+
+class ReportWriter:
+    """
+    Writes one run's report page by page, so memory stays flat on large runs
+    and a crashed run still leaves every finished page on disk.
+
+    html: the header goes out with the first page, each card is appended and
+          flushed as its page finishes, and close() adds the totals footer.
+    jsonl: one {"type": "page", ...} line per page, then a {"type": "summary"}
+           line on close(). A file without the summary line is from a run that
+           did not finish.
+    junit: one <testcase> per page (failures are issues, errors are unreachable
+           pages or crashed checks). Test cases are streamed to a .partial file
+           and wrapped with the suite totals on close().
+    """
+
+    def __init__(self, generator: ReportGenerator, project_name: str, formats=("html",)):
+        self.generator = generator
+        self.project_name = project_name
+        self.formats = formats
+        self.paths = {}
+        self.pages = 0
+        self.failed_pages = 0
+        self.errored_pages = 0
+        self.seconds = 0.0
+        self._files = {}
+        self._started = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(note=f"Run stopped early: {exc}" if exc_type else None)
+        return False
+
+    def _open(self):
+        self._started = datetime.datetime.now()
+        stem = f"report_{self.project_name.lower().replace(' ', '_')}_{self._started.strftime('%Y%m%d_%H%M%S')}"
+        for fmt in self.formats:
+            path = os.path.join(self.generator.output_dir, f"{stem}.{REPORT_FORMATS[fmt]}")
+            self.paths[fmt] = path
+            # JUnit needs the totals up front, so its test cases go to a side file until close()
+            self._files[fmt] = open(path + ".partial" if fmt == "junit" else path, "w")
+        if "html" in self._files:
+            self._files["html"].write(f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>QA Report - {self.project_name}</title>
+            <style>{HTML_STYLE}            </style>
+        </head>
+        <body>
+            <div class="container">
+                <h1>QA Automation Report</h1>
+                <div class="meta">
+                    <strong>Project:</strong> {self.project_name}<br>
+                    <strong>Generated:</strong> {self._started.strftime("%Y-%m-%d %H:%M:%S")}
+                </div>
+                """)
+
+    def add(self, result: dict):
+        """Appends one page result to every open format and flushes it to disk."""
+        try:
+            if self._started is None:
+                self._open()
+            issues = result.get('issues', [])
+            errored = any(i.startswith(("Could not reach page", "QA check error")) for i in issues)
+            self.pages += 1
+            self.failed_pages += 1 if issues else 0
+            self.errored_pages += 1 if errored else 0
+            page_seconds = sum((result.get('timings') or {}).values()) / 1000
+            self.seconds += page_seconds
+
+            if "html" in self._files:
+                self._files["html"].write(self.generator._render_card(result))
+            if "jsonl" in self._files:
+                record = {"type": "page", "project": self.project_name, "status": "fail" if issues else "pass"}
+                record.update(result)
+                self._files["jsonl"].write(json.dumps(record, default=str) + "\n")
+            if "junit" in self._files:
+                self._files["junit"].write(self._junit_case(result, issues, errored, page_seconds))
+            for f in self._files.values():
+                f.flush()
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to write report file: {e}")
+
+    def _junit_case(self, result, issues, errored, seconds):
+        case = f'    <testcase classname={quoteattr(self.project_name)} name={quoteattr(result.get("page_name") or result["url"])} time="{seconds:.3f}">\n'
+        if issues:
+            tag = "error" if errored else "failure"
+            case += f'      <{tag} message={quoteattr(f"{len(issues)} issue(s)")}>{escape(chr(10).join(issues))}</{tag}>\n'
+        case += f'      <system-out>{escape(result["url"])}</system-out>\n'
+        return case + "    </testcase>\n"
+
+    def close(self, run_timings: Optional[dict] = None, note: Optional[str] = None) -> dict:
+        """
+        Writes the totals and closes every file. Returns {format: path}, empty
+        if no page was ever added.
+        """
+        if self._started is None or not self._files:
+            return dict(self.paths)
+        totals = f"{self.pages} pages, {self.failed_pages} with issues"
+        try:
+            if "html" in self._files:
+                footer = f"<strong>Totals:</strong> {totals}"
+                footer += self.generator._render_timings(run_timings, "<br><strong>Run timings:</strong> ")
+                if note:
+                    footer += f"<br><strong>Note:</strong> {note}"
+                self._files["html"].write(f"""
+                <div class="footer">{footer}</div>
+            </div>
+        </body>
+        </html>
+        """)
+            if "jsonl" in self._files:
+                self._files["jsonl"].write(json.dumps({
+                    "type": "summary", "project": self.project_name, "pages": self.pages,
+                    "failed_pages": self.failed_pages, "run_timings": run_timings or {}, "note": note
+                }) + "\n")
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to write report file: {e}")
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+        if "junit" in self.paths:
+            self._finish_junit()
+        for fmt, path in self.paths.items():
+            logger.info(f"✅ {fmt.upper()} Report generated: {path}")
+        return dict(self.paths)
+
+    def _finish_junit(self):
+        path = self.paths["junit"]
+        failures = self.failed_pages - self.errored_pages
+        try:
+            with open(path, "w") as out, open(path + ".partial", "r") as cases:
+                out.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+                out.write(
+                    f'  <testsuite name={quoteattr(self.project_name)} tests="{self.pages}" failures="{failures}" '
+                    f'errors="{self.errored_pages}" time="{self.seconds:.3f}" timestamp="{self._started.isoformat(timespec="seconds")}">\n'
+                )
+                shutil.copyfileobj(cases, out)
+                out.write("  </testsuite>\n</testsuites>\n")
+            os.remove(path + ".partial")
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to write JUnit report: {e}")
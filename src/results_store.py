@@ -0,0 +1,378 @@
+import argparse
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import logging
+
+from .incremental_state import fingerprint, normalize_text
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id TEXT NOT NULL,
+    project_name TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    options TEXT,
+    pages INTEGER NOT NULL DEFAULT 0,
+    failed_pages INTEGER NOT NULL DEFAULT 0,
+    issues INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_project ON runs (project_id, id);
+
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    page_name TEXT,
+    passed INTEGER NOT NULL,
+    reused INTEGER NOT NULL DEFAULT 0,
+    links_total INTEGER,
+    links_cached INTEGER,
+    links_unverified INTEGER
+);
+CREATE INDEX IF NOT EXISTS pages_run ON pages (run_id);
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url, run_id);
+
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL,
+    page_id INTEGER NOT NULL,
+    project_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issues_run ON issues (run_id, fingerprint);
+CREATE INDEX IF NOT EXISTS issues_fingerprint ON issues (project_id, fingerprint, run_id);
+CREATE INDEX IF NOT EXISTS issues_url ON issues (url, run_id);
+
+-- page_id is NULL for run-wide stages (doc, page_checks, ticketing)
+CREATE TABLE IF NOT EXISTS timings (
+    run_id INTEGER NOT NULL,
+    page_id INTEGER,
+    stage TEXT NOT NULL,
+    ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS timings_run ON timings (run_id, stage);
+
+-- One row per link target checked on a page. status is NULL for timeouts, connection
+-- errors and hosts whose circuit was open; verified is 0 when the host kept throttling
+-- or its circuit was open, so the link's state is unknown rather than broken
+CREATE TABLE IF NOT EXISTS link_statuses (
+    run_id INTEGER NOT NULL,
+    page_id INTEGER NOT NULL,
+    target TEXT NOT NULL,
+    status INTEGER,
+    cached INTEGER NOT NULL DEFAULT 0,
+    verified INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS link_statuses_run ON link_statuses (run_id);
+CREATE INDEX IF NOT EXISTS link_statuses_target ON link_statuses (target, run_id);
+"""
+
+# A verified link that errored or answered 4xx/5xx
+_BROKEN_LINK = "(l.verified = 1 AND (l.status IS NULL OR l.status >= 400))"
+
+# Parts of issue messages that change between runs without the issue changing:
+# what was found instead, occurrence counts and snippets, and the broken link list
+_VOLATILE = (
+    (re.compile(r", Found: .*$", re.S), ""),
+    (re.compile(r" \(\d+x, first in .*\)$", re.S), ""),
+    (re.compile(r"^(Broken links)(?: found)?: .*$", re.S), r"\1"),
+)
+
+def issue_fingerprint(project_id, url, message):
+    """Identity of an issue across runs: the project, page and message minus its volatile details."""
+    key = message
+    for pattern, replacement in _VOLATILE:
+        key = pattern.sub(replacement, key)
+    return fingerprint(str(project_id), url, normalize_text(key))[:32]
+
+class ResultsStore:
+    """
+    Run history in a local SQLite file: runs, pages, issues, stage timings and
+    the status of every checked link, indexed by project, URL and issue fingerprint so new, fixed
+    and recurring issues can be queried without parsing reports.
+
+    start_run() is synchronous (it returns the run id). add_page() and
+    finish_run() hand rows to a background writer that commits them in
+    batched transactions, so recording never blocks the page checks.
+    """
+
+    def __init__(self, path, keep_runs=200, batch_size=500):
+        self.path = path
+        self.keep_runs = max(0, int(keep_runs or 0))
+        self.batch_size = max(1, int(batch_size))
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    @classmethod
+    def from_settings(cls, base_path, settings):
+        """The engine's store, or None when the results_store setting is false."""
+        if not settings.get('results_store', True):
+            return None
+        return cls(os.path.join(base_path, ".cache", "results.sqlite3"), keep_runs=settings.get('results_keep_runs', 200))
+
+    # --- writing ---------------------------------------------------------
+
+    def start_run(self, project_id, project_name=None, options=None):
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO runs (project_id, project_name, started_at, options) VALUES (?, ?, ?, ?)",
+                (str(project_id), project_name, time.time(), json.dumps(options or {}, sort_keys=True))
+            )
+        return cursor.lastrowid
+
+    def add_page(self, run_id, project_id, result):
+        """Queues one page result (as built by the engine) for the writer."""
+        project_id = str(project_id)
+        issues = list(result.get('issues', []))
+        link_stats = result.get('link_stats') or {}
+        timings = dict(result.get('timings') or {})
+        link_statuses = list(result.get('link_statuses') or [])
+
+        def write(db):
+            page_id = db.execute(
+                "INSERT INTO pages (run_id, url, page_name, passed, reused, links_total, links_cached, links_unverified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, result['url'], result.get('page_name'), int(not issues), int(bool(result.get('reused'))),
+                 link_stats.get('total'), link_stats.get('cached'), link_stats.get('unverified'))
+            ).lastrowid
+            db.executemany(
+                "INSERT INTO issues (run_id, page_id, project_id, url, fingerprint, message) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, page_id, project_id, result['url'], issue_fingerprint(project_id, result['url'], message), message)
+                 for message in issues]
+            )
+            db.executemany(
+                "INSERT INTO timings (run_id, page_id, stage, ms) VALUES (?, ?, ?, ?)",
+                [(run_id, page_id, stage, ms) for stage, ms in timings.items()]
+            )
+            db.executemany(
+                "INSERT INTO link_statuses (run_id, page_id, target, status, cached, verified) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, page_id, link['target'], link.get('status'), int(bool(link.get('cached'))), int(link.get('verified', True)))
+                 for link in link_statuses]
+            )
+
+        self._submit(write)
+
+    def finish_run(self, run_id, run_timings=None):
+        """Queues the run's totals and run-wide timings, prunes old runs, then waits for the writer."""
+        def write(db):
+            db.executemany(
+                "INSERT INTO timings (run_id, page_id, stage, ms) VALUES (?, NULL, ?, ?)",
+                [(run_id, stage, ms) for stage, ms in (run_timings or {}).items()]
+            )
+            db.execute(
+                "UPDATE runs SET finished_at = ?, "
+                "pages = (SELECT COUNT(*) FROM pages WHERE run_id = ?), "
+                "failed_pages = (SELECT COUNT(*) FROM pages WHERE run_id = ? AND passed = 0), "
+                "issues = (SELECT COUNT(*) FROM issues WHERE run_id = ?) "
+                "WHERE id = ?",
+                (time.time(), run_id, run_id, run_id, run_id)
+            )
+            if self.keep_runs:
+                self._prune(db, run_id)
+
+        self._submit(write)
+        self.flush()
+
+    def flush(self):
+        """Blocks until every queued write is committed."""
+        self._queue.join()
+
+    def _submit(self, write):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="results-store-writer", daemon=True)
+                self._writer.start()
+        self._queue.put(write)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._lock:
+                    self._db.execute("BEGIN")
+                    try:
+                        for write in batch:
+                            write(self._db)
+                        self._db.execute("COMMIT")
+                    except Exception:
+                        self._db.execute("ROLLBACK")
+                        raise
+            except Exception as e:
+                logger.error(f"Could not record {len(batch)} result(s) in {self.path}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _prune(self, db, run_id):
+        project_id = db.execute("SELECT project_id FROM runs WHERE id = ?", (run_id,)).fetchone()[0]
+        stale = [row[0] for row in db.execute(
+            "SELECT id FROM runs WHERE project_id = ? ORDER BY id DESC LIMIT -1 OFFSET ?", (project_id, self.keep_runs)
+        )]
+        if not stale:
+            return
+        marks = ",".join("?" * len(stale))
+        for table in ("issues", "timings", "link_statuses", "pages"):
+            db.execute(f"DELETE FROM {table} WHERE run_id IN ({marks})", stale)
+        db.execute(f"DELETE FROM runs WHERE id IN ({marks})", stale)
+
+    # --- queries ---------------------------------------------------------
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params)]
+
+    def runs(self, project_id, limit=20):
+        """The project's latest finished runs, newest first, with page and issue counts (the trend)."""
+        return self._query(
+            "SELECT id, project_name, started_at, finished_at, pages, failed_pages, issues FROM runs "
+            "WHERE project_id = ? AND finished_at IS NOT NULL ORDER BY id DESC LIMIT ?",
+            (str(project_id), int(limit))
+        )
+
+    def _resolve_run(self, project_id, run_id=None):
+        """run_id, or the project's latest finished run when None."""
+        if run_id is not None:
+            return run_id
+        latest = self._query(
+            "SELECT id FROM runs WHERE project_id = ? AND finished_at IS NOT NULL ORDER BY id DESC LIMIT 1", (str(project_id),)
+        )
+        return latest[0]['id'] if latest else None
+
+    # The project's most recent finished run before cur.run_id that checked cur.url. Each
+    # page is compared with that run, so runs of a subset of pages (--all shards, ad-hoc
+    # runs of different URLs) don't make every other page's issues look new or fixed.
+    _PREVIOUS_CHECK = (
+        "(SELECT MAX(pg.run_id) FROM pages pg JOIN runs r ON r.id = pg.run_id "
+        "WHERE pg.url = cur.url AND pg.run_id < cur.run_id AND r.project_id = ? AND r.finished_at IS NOT NULL)"
+    )
+
+    def new_issues(self, project_id, run_id=None):
+        """Issues in the run (default: latest) that the last earlier run checking the same page did not have."""
+        run_id = self._resolve_run(project_id, run_id)
+        if run_id is None:
+            return []
+        return self._query(
+            "SELECT cur.url, cur.message, cur.fingerprint FROM issues cur WHERE cur.run_id = ? AND NOT EXISTS "
+            f"(SELECT 1 FROM issues p WHERE p.run_id = {self._PREVIOUS_CHECK} AND p.fingerprint = cur.fingerprint) "
+            "ORDER BY cur.url, cur.id",
+            (run_id, str(project_id))
+        )
+
+    def fixed_issues(self, project_id, run_id=None):
+        """Issues the last earlier run checking a page had that the run (default: latest) checked again and found gone."""
+        run_id = self._resolve_run(project_id, run_id)
+        if run_id is None:
+            return []
+        return self._query(
+            "SELECT p.url, p.message, p.fingerprint FROM pages cur "
+            f"JOIN issues p ON p.url = cur.url AND p.run_id = {self._PREVIOUS_CHECK} "
+            "WHERE cur.run_id = ? AND NOT EXISTS (SELECT 1 FROM issues i WHERE i.run_id = cur.run_id AND i.fingerprint = p.fingerprint) "
+            "ORDER BY p.url, p.id",
+            (str(project_id), run_id)
+        )
+
+    def recurring_issues(self, project_id, run_id=None, min_runs=2):
+        """
+        Issues in the run (default: latest) that appeared in at least min_runs
+        runs, with how many runs and when they were first seen.
+        """
+        run_id = self._resolve_run(project_id, run_id)
+        if run_id is None:
+            return []
+        return self._query(
+            "SELECT i.url, i.message, i.fingerprint, COUNT(DISTINCT h.run_id) AS runs, MIN(r.started_at) AS first_seen "
+            "FROM issues i JOIN issues h ON h.project_id = i.project_id AND h.fingerprint = i.fingerprint "
+            "JOIN runs r ON r.id = h.run_id "
+            "WHERE i.run_id = ? GROUP BY i.id HAVING runs >= ? ORDER BY runs DESC, first_seen",
+            (run_id, int(min_runs))
+        )
+
+    def issue_history(self, project_id, fingerprint):
+        """Every run an issue appeared in, oldest first: the first row is when it first appeared."""
+        return self._query(
+            "SELECT r.id AS run_id, r.started_at, i.url, i.message FROM issues i JOIN runs r ON r.id = i.run_id "
+            "WHERE i.project_id = ? AND i.fingerprint = ? ORDER BY r.id",
+            (str(project_id), fingerprint)
+        )
+
+    def stage_trend(self, project_id, stage, limit=20):
+        """Mean and max ms of one stage per run (per page, or run-wide for doc/page_checks/ticketing), newest first."""
+        return self._query(
+            "SELECT r.id AS run_id, r.started_at, AVG(t.ms) AS mean_ms, MAX(t.ms) AS max_ms, COUNT(*) AS samples "
+            "FROM runs r JOIN timings t ON t.run_id = r.id WHERE r.project_id = ? AND t.stage = ? "
+            "GROUP BY r.id ORDER BY r.id DESC LIMIT ?",
+            (str(project_id), stage, int(limit))
+        )
+
+    def link_trend(self, project_id, target=None, limit=20):
+        """
+        Per run, newest first: link targets checked, broken (verified 4xx/5xx or
+        errors), unverified and served from cache. Pass target to follow one link.
+        """
+        where, params = "r.project_id = ?", [str(project_id)]
+        if target:
+            where += " AND l.target = ?"
+            params.append(target)
+        return self._query(
+            "SELECT r.id AS run_id, r.started_at, COUNT(*) AS checked, "
+            f"SUM({_BROKEN_LINK}) AS broken, SUM(l.verified = 0) AS unverified, SUM(l.cached) AS cached "
+            f"FROM runs r JOIN link_statuses l ON l.run_id = r.id WHERE {where} "
+            "GROUP BY r.id ORDER BY r.id DESC LIMIT ?",
+            params + [int(limit)]
+        )
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the auto-bugherd results history")
+    parser.add_argument("query", choices=["runs", "new", "fixed", "recurring", "history", "timings", "links"])
+    parser.add_argument("project", help="Project ID from config.json ('ad-hoc' for ad-hoc and webhook runs)")
+    parser.add_argument("arg", nargs="?", help="Issue fingerprint for 'history', stage name for 'timings', link target for 'links'")
+    parser.add_argument("--run", type=int, help="Run ID to inspect (default: latest)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "results.sqlite3"))
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.query == "runs":
+        rows = store.runs(args.project, args.limit)
+    elif args.query == "new":
+        rows = store.new_issues(args.project, args.run)
+    elif args.query == "fixed":
+        rows = store.fixed_issues(args.project, args.run)
+    elif args.query == "recurring":
+        rows = store.recurring_issues(args.project, args.run)
+    elif args.query == "history":
+        rows = store.issue_history(args.project, args.arg)
+    elif args.query == "links":
+        rows = store.link_trend(args.project, args.arg, args.limit)
+    else:
+        rows = store.stage_trend(args.project, args.arg or "fetch", args.limit)
+    for row in rows:
+        print(json.dumps(row))
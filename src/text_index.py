@@ -0,0 +1,96 @@
+import operator
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import accumulate
+
+class PageTextIndex:
+    """
+    Preprocessed view of a page's text, built once and queried by every content check.
+
+    Holds the raw and lowercased text, the lowercased word array, word-length
+    prefix sums and a word-id array over the page vocabulary, so each metric,
+    phrase rule or fuzzy lookup avoids re-lowering and re-splitting the page.
+    """
+
+    def __init__(self, text):
+        self.raw = text or ""
+        self.lowered = self.raw.lower()
+        self.words = self.lowered.split()
+        self.prefix = [0, *accumulate(map(len, self.words))]
+
+        # Vocabulary ids let per-needle work run once per distinct word instead of per occurrence
+        vocab = {}
+        self.word_ids = [vocab.setdefault(word, len(vocab)) for word in self.words]
+        self.vocabulary = list(vocab)
+
+    @classmethod
+    def of(cls, text):
+        """Returns text unchanged if it is already an index, else a (cached) index for it."""
+        if isinstance(text, cls):
+            return text
+        return _index_for_text(text)
+
+    def fuzzy_contains(self, needle, threshold=0.8):
+        """
+        True if needle occurs verbatim (case-insensitive) or any window of the same
+        number of words scores a SequenceMatcher ratio >= threshold.
+
+        Windows are pre-screened with upper bounds on ratio() (length, characters
+        shared with the needle, then the character multiset), so ratio() only runs
+        on windows that could reach the threshold and results are identical to
+        scoring every window.
+        """
+        needle = needle.lower().strip()
+
+        # Exact match first
+        if needle in self.lowered:
+            return True
+
+        n_len = len(needle.split())
+        if n_len == 0 or n_len > len(self.words):
+            return False
+
+        n_chars = len(needle)
+        needle_counts = Counter(needle)
+        gaps = n_len - 1
+        space_hits = gaps if ' ' in needle_counts else 0
+
+        # Per window: character length, and count of characters that also occur in the needle
+        strip_needle_chars = str.maketrans('', '', ''.join(needle_counts))
+        vocab_hits = [len(word) - len(word.translate(strip_needle_chars)) for word in self.vocabulary]
+        hit_prefix = [0, *accumulate(map(vocab_hits.__getitem__, self.word_ids))]
+        seg_lens = map(operator.sub, self.prefix[n_len:], self.prefix)
+        seg_hits = map(operator.sub, hit_prefix[n_len:], hit_prefix)
+
+        # ratio() <= 2*min(len)/total (SequenceMatcher.real_quick_ratio), and
+        # ratio() <= 2*(segment chars found in the needle)/total
+        candidates = [
+            i for i, (seg_len, hits) in enumerate(zip(seg_lens, seg_hits))
+            if 2.0 * min(n_chars, seg_len + gaps, hits + space_hits) / (n_chars + seg_len + gaps) >= threshold
+        ]
+        if not candidates:
+            return False
+
+        matcher = SequenceMatcher(None)
+        matcher.set_seq1(needle)
+        needle_items = needle_counts.items()
+        rejected = set()
+        for i in candidates:
+            segment = " ".join(self.words[i:i + n_len])
+            if segment in rejected:
+                continue
+            total = n_chars + len(segment)
+
+            # ratio() <= 2*shared chars/total (SequenceMatcher.quick_ratio)
+            shared = sum([min(count, segment.count(char)) for char, count in needle_items])
+            if 2.0 * shared / total >= threshold:
+                matcher.set_seq2(segment)
+                if matcher.ratio() >= threshold:
+                    return True
+            rejected.add(segment)
+        return False
+
+@lru_cache(maxsize=32)
+def _index_for_text(text):
+    return PageTextIndex(text)
@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .bugherd_client import BugHerdClient
+from .host_limiter import HostLimiter, TokenBucket, THROTTLE_STATUSES
+from .incremental_state import fingerprint
+from .metrics import HTTP_ERRORS
+from .profiler import in_run_context
+
+logger = logging.getLogger(__name__)
+
+class TicketOutbox:
+    """
+    Collects BugHerd tickets during a run and files them in one batch afterwards.
+
+    - Tickets are deduplicated by a fingerprint of project, page URL, issue type
+      and element selector, both within a run and against tickets filed in the
+      last `dedupe_days`.
+    - flush() submits concurrently under a token-bucket rate limit (BugHerd
+      allows an average of 60 requests a minute with bursts of 10), retrying
+      throttled, 5xx and connection failures with backoff.
+    - Tickets that still fail are saved and retried on the next flush.
+    - Tickets BugHerd rejects outright (other 4xx responses, or no project id)
+      would fail the same way every time, so they move to a dead-letter list
+      kept in the outbox file instead.
+    """
+
+    def __init__(self, client, path=None, rate_per_sec=1.0, burst=10, max_workers=4, max_retries=3,
+                 backoff_base=2.0, backoff_max=60.0, dedupe_days=30):
+        self.client = client
+        self.path = path
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.dedupe_seconds = float(dedupe_days) * 86400
+        self._lock = threading.Lock()
+        self._filed = {}
+        self._queued = {}
+        self._dead = []
+        self._load()
+
+    @classmethod
+    def from_settings(cls, client, path, settings):
+        return cls(
+            client, path,
+            rate_per_sec=settings.get('bugherd_rate_per_sec', 1.0),
+            burst=settings.get('bugherd_burst', 10),
+            max_workers=settings.get('bugherd_workers', 4),
+            max_retries=settings.get('bugherd_max_retries', 3),
+            dedupe_days=settings.get('bugherd_dedupe_days', 30)
+        )
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+            self._filed = state.get('filed', {})
+            self._queued = {item['fingerprint']: item for item in state.get('pending', [])}
+            self._dead = state.get('dead', [])
+            if self._queued:
+                logger.info(f"{len(self._queued)} unsent ticket(s) from earlier runs will be retried")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable ticket outbox {self.path}: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._queued)
+
+    def add(self, project_id, issue_type, description, page_url=None, selector=None):
+        """Queues a ticket. Returns False if the same issue is already queued or was filed recently."""
+        key = fingerprint(str(project_id), page_url or "", issue_type, selector or "")
+        with self._lock:
+            filed_at = self._filed.get(key)
+            if filed_at and time.time() - filed_at < self.dedupe_seconds:
+                logger.debug(f"Skipping duplicate ticket '{issue_type}' for {page_url}")
+                return False
+            if key in self._queued:
+                return False
+            self._queued[key] = {
+                "fingerprint": key,
+                "project_id": project_id,
+                "issue_type": issue_type,
+                "description": description,
+                "page_url": page_url,
+                "selector": selector
+            }
+        return True
+
+    def take(self):
+        """Removes and returns every queued ticket, e.g. to hand them to another process's outbox."""
+        with self._lock:
+            items = list(self._queued.values())
+            self._queued.clear()
+        return items
+
+    def add_element_issue(self, project_id, issue_type, element_info, expected, found, page_url):
+        """
+        Queues a ticket carrying the element's location (see ElementLocator.element_info).
+        Without a css_selector (e.g. from a head-only run) the ticket is deduplicated
+        on project, page and issue type alone.
+        """
+        description = BugHerdClient.element_ticket_description(issue_type, element_info, expected, found, page_url)
+        selector = (element_info or {}).get('css_selector')
+        return self.add(project_id, issue_type, description, page_url=page_url, selector=selector)
+
+    def flush(self):
+        """Files every queued ticket. Returns (filed, failed) counts; failures stay queued."""
+        with self._lock:
+            items = list(self._queued.values())
+        if not items:
+            return 0, 0
+        if not self.client.api_key:
+            logger.error(f"BugHerd API Key missing. Keeping {len(items)} ticket(s) for a later flush.")
+            self.save()
+            return 0, len(items)
+
+        logger.info(f"Filing {len(items)} BugHerd ticket(s)")
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            outcomes = list(executor.map(in_run_context(self._submit), items))
+
+        filed = sum(outcomes)
+        failed = len(items) - filed
+        with self._lock:
+            retrying = sum(1 for item in items if item['fingerprint'] in self._queued)
+        if retrying:
+            logger.warning(f"{retrying} ticket(s) could not be filed and will be retried on the next flush")
+        if failed > retrying:
+            logger.warning(f"{failed - retrying} ticket(s) were rejected and moved to the dead-letter list in {self.path}")
+        self.save()
+        return filed, failed
+
+    def _dead_letter(self, item, reason):
+        """Drops a ticket that can never be filed, keeping it in the outbox file for inspection."""
+        with self._lock:
+            self._queued.pop(item['fingerprint'], None)
+            self._dead.append(dict(item, error=reason, failed_at=time.time()))
+        logger.error(f"Dropping ticket '{item['issue_type']}' for {item['page_url']}: {reason}")
+        return False
+
+    def _submit(self, item):
+        if not item.get('project_id'):
+            return self._dead_letter(item, "no bugherd_project_id")
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.client.post_task(item['project_id'], item['description'], page_url=item['page_url'])
+            except requests.Timeout as e:
+                # Retried like a 5xx: the task may or may not have been created
+                HTTP_ERRORS.inc(target='bugherd', status='timeout')
+                logger.warning(f"BugHerd timed out: {e}")
+            except Exception as e:
+                HTTP_ERRORS.inc(target='bugherd', status='error')
+                logger.warning(f"Error connecting to BugHerd: {e}")
+            else:
+                if response.status_code != 201:
+                    HTTP_ERRORS.inc(target='bugherd', status=response.status_code)
+                if response.status_code == 201:
+                    with self._lock:
+                        self._queued.pop(item['fingerprint'], None)
+                        self._filed[item['fingerprint']] = time.time()
+                    logger.info(f"Ticket created in project {item['project_id']}: {item['issue_type']}")
+                    return True
+                if response.status_code not in THROTTLE_STATUSES and response.status_code < 500:
+                    return self._dead_letter(item, f"HTTP {response.status_code} - {response.text[:200]}")
+                if response.status_code in THROTTLE_STATUSES:
+                    # Pausing the shared bucket holds back every worker, this one included,
+                    # so the acquire() at the top of the next attempt does the waiting
+                    retry_after = HostLimiter.parse_retry_after(response.headers.get('Retry-After'))
+                    delay = retry_after if retry_after is not None else self.backoff_base * (2 ** attempt)
+                    self.bucket.pause(min(delay, self.backoff_max))
+                    continue
+
+            if attempt < self.max_retries:
+                time.sleep(min(self.backoff_base * (2 ** attempt), self.backoff_max))
+        logger.error(f"Giving up on ticket '{item['issue_type']}' for {item['page_url']} after {self.max_retries + 1} attempts")
+        return False
+
+    def save(self):
+        """Persists filed fingerprints still inside the dedupe window, unsent tickets and dead letters."""
+        if not self.path:
+            return
+        now = time.time()
+        with self._lock:
+            state = {
+                "filed": {key: at for key, at in self._filed.items() if now - at < self.dedupe_seconds},
+                "pending": list(self._queued.values()),
+                "dead": list(self._dead)
+            }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save ticket outbox: {e}")
@@ -1,17 +1,18 @@
 from flask import Flask, request, jsonify, abort
-import sys
 import os
 import threading
+import time
 import logging
+from contextlib import nullcontext
 from functools import wraps
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Add src to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from engine import BugHerdEngine
+from .engine import BugHerdEngine
+from .job_queue import JobQueue, JobWorkers
+from .metrics import REGISTRY
 
 app = Flask(__name__)
 
@@ -39,8 +40,48 @@ def get_engine():
     global _engine
     if _engine is None:
         _engine = BugHerdEngine()
+        # The listener re-checks the same pages over and over, so keeping recent
+        # parses pays off here; CLI runs parse each page once and leave this off
+        if _engine.page_cache:
+            _engine.page_cache.keep_parsed(_engine.config['settings'].get('webhook_parsed_cache', 16))
     return _engine
 
+# Durable job queue drained by a fixed worker pool. Both are created on first use,
+# so the workers run under any WSGI server (gunicorn, flask run), not only __main__.
+_queue = None
+_workers = None
+_queue_lock = threading.Lock()
+def get_queue():
+    global _queue, _workers
+    with _queue_lock:
+        if _queue is None:
+            engine = get_engine()
+            settings = engine.config['settings']
+            _queue = JobQueue(
+                os.path.join(engine.base_path, ".cache", "webhook_jobs.sqlite3"),
+                max_pending=settings.get('webhook_queue_max', 100),
+                lease_seconds=settings.get('webhook_job_lease', 60)
+            )
+            _workers = JobWorkers(_queue, run_job, concurrency=settings.get('webhook_workers', 2))
+            _workers.start()
+    return _queue
+
+WEBHOOK_EVENTS = REGISTRY.counter(
+    "autobugherd_webhook_events_total", "Webhook events received, by what happened to them", labels=("disposition",)
+)
+JOB_SECONDS = REGISTRY.histogram(
+    "autobugherd_job_seconds", "Wall time of each webhook QA job, including BugHerd comments", labels=("success",)
+)
+REGISTRY.gauge(
+    "autobugherd_job_queue_jobs", "Webhook jobs in the queue, by status",
+    lambda: {(status,): count for status, count in get_queue().counts().items()}, labels=("status",)
+)
+
+def start_workers():
+    """Opens the queue and starts its workers now rather than on the first request."""
+    get_queue()
+    return _workers
+
 @app.route('/webhook', methods=['POST'])
 @require_secret
 def handle_bugherd_webhook():
@@ -58,29 +99,106 @@ def handle_bugherd_webhook():
 
     if event in ['task_create', 'task_update']:
         if target_url:
-            threading.Thread(target=process_task_qa, args=(target_url, task_id, project_id)).start()
-            return jsonify({"status": "processing", "task_id": task_id}), 202
+            # Bursts of events for the same URL collapse into one debounced QA run
+            settings = get_engine().config['settings']
+            payload = {"url": target_url, "tasks": [{"task_id": task_id, "project_id": project_id}]}
+            profile = job_profile_mode(request.args.get('profile'), settings)
+            if profile:
+                payload["profile"] = profile
+            job_id, disposition = get_queue().enqueue(
+                payload,
+                key=target_url,
+                delay=float(settings.get('webhook_debounce_seconds', 10)),
+                max_delay=float(settings.get('webhook_debounce_max', 60)),
+                merge=merge_tasks
+            )
+            WEBHOOK_EVENTS.inc(disposition=disposition)
+            if job_id is None:
+                logger.warning(f"Job queue full. Rejecting event for Task #{task_id}")
+                return jsonify({"status": "busy", "reason": "Job queue full"}), 503, {"Retry-After": "30"}
+            if disposition != 'queued':
+                logger.info(f"Task #{task_id} event {disposition} (job {job_id}, {target_url})")
+            return jsonify({"status": disposition, "task_id": task_id, "job_id": job_id}), 202
         else:
+            WEBHOOK_EVENTS.inc(disposition='ignored')
             return jsonify({"status": "ignored", "reason": "No URL in task"}), 200
 
+    WEBHOOK_EVENTS.inc(disposition='ignored')
     return jsonify({"status": "ignored"}), 200
 
-def process_task_qa(url, task_id, project_id):
-    try:
-        engine = get_engine()
-        success = engine.run_qa_ad_hoc(url)
-        
-        status_msg = f"QA Results for {url}:\n"
-        status_msg += "✅ Passed" if success else "⚠️ Issues found. See report."
-        
-        engine.bh_client.create_ticket_comment(project_id, task_id, status_msg)
-    except Exception as e:
-        logger.error(f"Webhook QA processing failed for task {task_id}: {e}")
+@app.route('/jobs/<int:job_id>', methods=['GET'])
+@require_secret
+def job_status(job_id):
+    job = get_queue().get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job), 200
+
+@app.route('/jobs', methods=['GET'])
+@require_secret
+def job_counts():
+    return jsonify(get_queue().counts()), 200
+
+@app.route('/metrics', methods=['GET'])
+@require_secret
+def metrics():
+    """Stage timing histograms, queue depth and HTTP error counters in the Prometheus text format."""
+    return REGISTRY.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+def job_profile_mode(requested, settings):
+    """
+    None, 'profile' or 'trace' for a new job: the `profile` query parameter
+    (1 or trace) if given, else the webhook_profile setting (false, true or "trace").
+    """
+    value = requested if requested is not None else settings.get('webhook_profile', False)
+    if value in (True, '1', 'true', 'profile'):
+        return 'profile'
+    if value == 'trace':
+        return 'trace'
+    return None
+
+def merge_tasks(existing, new):
+    """Combines two job payloads for the same URL, keeping each task once."""
+    tasks = existing.get('tasks', [])
+    known = {task.get('task_id') for task in tasks}
+    for task in new.get('tasks', []):
+        if task.get('task_id') not in known:
+            tasks.append(task)
+            known.add(task.get('task_id'))
+    merged = {"url": existing['url'], "tasks": tasks}
+    # Profiling requested by any of the coalesced events sticks, tracing winning over a plain profile
+    modes = {existing.get('profile'), new.get('profile')}
+    profile = 'trace' if 'trace' in modes else 'profile' if 'profile' in modes else None
+    if profile:
+        merged["profile"] = profile
+    return merged
+
+def run_job(job_id, payload):
+    """Runs QA once for the job's URL, then comments on every task coalesced or attached to it."""
+    engine = get_engine()
+    start = time.perf_counter()
+    profile = payload.get('profile')
+    with engine.profiler(f"job_{job_id}", trace=profile == 'trace') if profile else nullcontext():
+        success = engine.run_qa_ad_hoc(payload['url'])
+
+    final = get_queue().seal(job_id) or payload
+    tasks = final.get('tasks') or [{"task_id": final.get('task_id'), "project_id": final.get('project_id')}]
+    for task in tasks:
+        post_qa_comment(engine, payload['url'], task.get('task_id'), task.get('project_id'), success)
+    JOB_SECONDS.observe(time.perf_counter() - start, success=str(success).lower())
+    return {"success": success, "tasks": [task.get('task_id') for task in tasks]}
+
+def post_qa_comment(engine, url, task_id, project_id, success):
+    status_msg = f"QA Results for {url}:\n"
+    status_msg += "✅ Passed" if success else "⚠️ Issues found. See report."
+
+    engine.bh_client.create_ticket_comment(project_id, task_id, status_msg)
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     # Warn if secret is not set
     if not WEBHOOK_SECRET:
         logger.warning("No BUGHERD_WEBHOOK_SECRET set. Webhook listener is UNSECURE.")
-    
+
+    start_workers()
     app.run(host='0.0.0.0', port=port)